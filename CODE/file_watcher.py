@@ -0,0 +1,188 @@
+"""Watch a single file for completed writes.
+
+On Linux the watcher is driven by inotify through :mod:`ctypes`, so changes
+are reported within milliseconds without polling.  Elsewhere, or if inotify
+cannot be set up, it falls back to checking the file's modification time at
+a fixed interval.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from typing import Any, Optional, Tuple, Union
+
+# Seconds without further events before a burst of writes is reported.
+DEFAULT_DEBOUNCE = 0.05
+
+# Seconds between modification-time checks in the polling fallback.
+DEFAULT_CHECK_INTERVAL = 5.0
+
+# inotify constants from <sys/inotify.h>.
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+# Layout of the fixed part of ``struct inotify_event``.
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class PollingWatcher:
+    """Report changes by comparing the file's mtime and size periodically."""
+
+    def __init__(
+        self, path: str, check_interval: float = DEFAULT_CHECK_INTERVAL
+    ) -> None:
+        self.path = path
+        self.check_interval = check_interval
+        self._signature = self._stat()
+        self._next_check = time.monotonic() + check_interval
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def wait(self, timeout: float, wake: Any = None) -> bool:
+        """Sleep for ``timeout`` seconds and return whether the file changed.
+
+        ``wake`` is as for :meth:`InotifyWatcher.wait`.
+        """
+        if wake is None:
+            time.sleep(timeout)
+        else:
+            select.select([wake], [], [], timeout)
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        self._next_check = now + self.check_interval
+
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return False
+        self._signature = signature
+        return True
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> PollingWatcher:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class InotifyWatcher:
+    """Report writes to a file as soon as the writer closes it.
+
+    The parent directory is watched so that files replaced by an atomic
+    rename are picked up as well.  Events arriving in quick succession are
+    coalesced into a single notification once ``debounce`` seconds pass
+    without another one.
+    """
+
+    def __init__(self, path: str, debounce: float = DEFAULT_DEBOUNCE) -> None:
+        self.path = path
+        self.debounce = debounce
+        self._name = os.fsencode(os.path.basename(path))
+        self._last_event: Optional[float] = None
+
+        libc_name = ctypes.util.find_library("c")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+        directory = os.path.dirname(os.path.abspath(path))
+        watch = libc.inotify_add_watch(
+            self._fd, os.fsencode(directory), _IN_CLOSE_WRITE | _IN_MOVED_TO
+        )
+        if watch < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, os.strerror(errno), directory)
+
+    def _drain(self) -> bool:
+        """Read all queued events and return whether any concern the file."""
+        seen = False
+        while True:
+            try:
+                buffer = os.read(self._fd, 4096)
+            except BlockingIOError:
+                return seen
+            offset = 0
+            while offset < len(buffer):
+                _, _, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+                offset += _EVENT_HEADER.size
+                name = buffer[offset : offset + length].rstrip(b"\0")
+                offset += length
+                seen = seen or name == self._name
+
+    def wait(self, timeout: float, wake: Any = None) -> bool:
+        """Block for up to ``timeout`` seconds waiting for a settled change.
+
+        Returns ``True`` once a write has been followed by ``debounce``
+        seconds of quiet, and ``False`` if the timeout expires first.
+        ``wake`` is an optional file descriptor, or object with a
+        ``fileno()`` method, that ends the wait early with ``False`` as soon
+        as it becomes readable; it is not read from.
+        """
+        watched = [self._fd] if wake is None else [self._fd, wake]
+        deadline = time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            if self._last_event is not None:
+                settle = self._last_event + self.debounce
+                if now >= settle:
+                    self._last_event = None
+                    return True
+                remaining = min(deadline, settle) - now
+            else:
+                remaining = deadline - now
+            if now >= deadline:
+                return False
+
+            ready, _, _ = select.select(watched, [], [], max(remaining, 0.0))
+            if wake is not None and wake in ready:
+                return False
+            if ready and self._drain():
+                self._last_event = time.monotonic()
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __enter__(self) -> InotifyWatcher:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def create_watcher(
+    path: str,
+    check_interval: float = DEFAULT_CHECK_INTERVAL,
+    debounce: float = DEFAULT_DEBOUNCE,
+) -> Union[InotifyWatcher, PollingWatcher]:
+    """Return the best available watcher for ``path``.
+
+    inotify is used on Linux; if it is unavailable the polling watcher
+    checks the file every ``check_interval`` seconds instead.
+    """
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(path, debounce)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(path, check_interval)
@@ -0,0 +1,546 @@
+"""Columnar loading of loan portfolio CSV files.
+
+Loans are held as a struct of NumPy arrays rather than one ``dict`` per row,
+which keeps large portfolios compact and lets callers work on whole columns.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import itertools
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+# Column names used by the loan CSV files.
+FIELDNAMES = [
+    "loanbalance",
+    "loanrate",
+    "loanaddedOrRemovedFlag",
+    "loantermOrAgeInMonths",
+    "cluster",
+]
+
+# Flag values (case-insensitive) that mark a loan as newly added.
+ADDED_FLAGS = ("added", "new", "1", "true", "yes")
+
+# Width of the byte strings used to parse the flag column.  Longer values are
+# truncated, which cannot turn them into one of ``ADDED_FLAGS``.
+_FLAG_WIDTH = 16
+
+# Width of the byte strings used to parse a loan identity column.
+_KEY_WIDTH = 64
+
+# Names of the LoanColumns attributes that hold loan data.
+_DATA_FIELDS = ("balance", "rate", "term", "added", "cluster")
+
+# Rows parsed at a time by the streaming reader.
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+# Suffix of the directory holding the binary column cache next to a CSV.
+CACHE_SUFFIX = ".npcache"
+
+# Bumped whenever the layout of the column cache changes.
+_CACHE_VERSION = 1
+
+# Structured dtype field for each CSV column that is loaded.
+_COLUMN_DTYPES = {
+    "loanbalance": ("balance", np.float64),
+    "loanrate": ("rate", np.float64),
+    "loanaddedOrRemovedFlag": ("flag", f"S{_FLAG_WIDTH}"),
+    "loantermOrAgeInMonths": ("term", np.float64),
+    "cluster": ("cluster", np.int32),
+}
+
+
+@dataclass(eq=False)
+class LoanColumns:
+    """Loan records stored column by column.
+
+    Attributes
+    ----------
+    balance : np.ndarray
+        Loan balances as ``float64``.
+    rate : np.ndarray
+        Interest rates as ``float64``.
+    term : np.ndarray
+        Loan term or age in months as ``float64``.
+    added : np.ndarray
+        ``True`` for newly added loans, ``False`` for removed ones.
+    cluster : np.ndarray
+        Cluster identifiers as ``int32`` (zero when the CSV has none).
+    key : np.ndarray, optional
+        Loan identities read from a key column, as byte strings.  ``None``
+        when no key column was requested.
+    """
+
+    balance: np.ndarray = field(default_factory=lambda: np.empty(0, np.float64))
+    rate: np.ndarray = field(default_factory=lambda: np.empty(0, np.float64))
+    term: np.ndarray = field(default_factory=lambda: np.empty(0, np.float64))
+    added: np.ndarray = field(default_factory=lambda: np.empty(0, bool))
+    cluster: np.ndarray = field(default_factory=lambda: np.empty(0, np.int32))
+    key: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.balance)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, LoanColumns):
+            return NotImplemented
+        return all(
+            np.array_equal(getattr(self, name), getattr(other, name))
+            for name in _DATA_FIELDS
+        )
+
+    def take(self, indices: np.ndarray) -> LoanColumns:
+        """Return the loans at ``indices``, in that order."""
+        return LoanColumns(
+            **{name: getattr(self, name)[indices] for name in _DATA_FIELDS},
+            key=None if self.key is None else self.key[indices],
+        )
+
+
+def _read_header(csv_path: str) -> List[str]:
+    """Return the column names from the first line of ``csv_path``."""
+    with open(csv_path, newline="") as csvfile:
+        return [name.strip() for name in next(csv.reader(csvfile), [])]
+
+
+def read_header_line(csv_path: str) -> bytes:
+    """Return the raw first line of ``csv_path``, including its newline."""
+    with open(csv_path, "rb") as csvfile:
+        return csvfile.readline()
+
+
+def concatenate_loans(parts: Iterable[LoanColumns]) -> LoanColumns:
+    """Return the loans of all ``parts`` joined in order."""
+    # Empty parts are dropped so that they do not discard the other parts' keys.
+    parts = list(parts)
+    parts = [part for part in parts if len(part)] or parts
+    columns = {
+        name: np.concatenate([getattr(part, name) for part in parts])
+        for name in _DATA_FIELDS
+    }
+    if all(part.key is not None for part in parts):
+        columns["key"] = np.concatenate([part.key for part in parts])
+    return LoanColumns(**columns)
+
+
+def _flags_to_added(flags: np.ndarray) -> np.ndarray:
+    """Return a boolean array marking which raw flag strings mean "added"."""
+    normalized = np.char.lower(np.char.strip(flags))
+    return np.isin(normalized, [flag.encode() for flag in ADDED_FLAGS])
+
+
+def _parse_loans(
+    source: Union[str, Iterable[str]],
+    header: List[str],
+    skiprows: int,
+    csv_path: str,
+    key_column: Optional[str] = None,
+) -> LoanColumns:
+    """Parse CSV rows from ``source`` laid out according to ``header``."""
+    required = [name for name in FIELDNAMES if name != "cluster"]
+    if key_column is not None:
+        required.append(key_column)
+    missing = [name for name in required if name not in header]
+    if missing:
+        raise ValueError(f"{csv_path} is missing columns: {', '.join(missing)}")
+
+    usecols = [idx for idx, name in enumerate(header) if name in _COLUMN_DTYPES]
+    dtype = [_COLUMN_DTYPES[header[idx]] for idx in usecols]
+    if key_column is not None:
+        # Read as an extra field, so a data column can double as the key.
+        usecols.append(header.index(key_column))
+        dtype.append(("key", f"S{_KEY_WIDTH}"))
+    table = np.loadtxt(
+        source,
+        delimiter=",",
+        skiprows=skiprows,
+        usecols=usecols,
+        dtype=dtype,
+        ndmin=1,
+        encoding="utf-8",
+        quotechar='"',
+    )
+
+    if "cluster" in table.dtype.names:
+        cluster = np.ascontiguousarray(table["cluster"])
+    else:
+        cluster = np.zeros(len(table), dtype=np.int32)
+    return LoanColumns(
+        balance=np.ascontiguousarray(table["balance"]),
+        rate=np.ascontiguousarray(table["rate"]),
+        term=np.ascontiguousarray(table["term"]),
+        added=_flags_to_added(table["flag"]),
+        cluster=cluster,
+        key=np.char.strip(table["key"]) if key_column is not None else None,
+    )
+
+
+def load_loans(csv_path: str, key_column: Optional[str] = None) -> LoanColumns:
+    """Load loan data from ``csv_path`` into typed columns.
+
+    The numeric columns are parsed straight into NumPy arrays in a single
+    pass, without building an intermediate Python object per row.  If
+    ``key_column`` is given, that column is also read as each loan's identity.
+    """
+    header = _read_header(csv_path)
+    return _parse_loans(csv_path, header, 1, csv_path, key_column)
+
+
+def cache_path(csv_path: str) -> str:
+    """Return the directory of the binary column cache for ``csv_path``."""
+    return csv_path + CACHE_SUFFIX
+
+
+def _cache_metadata(csv_path: str, key_column: Optional[str]) -> dict:
+    """Return the metadata a valid cache for ``csv_path`` must record."""
+    stat = os.stat(csv_path)
+    return {
+        "version": _CACHE_VERSION,
+        "source": os.path.abspath(csv_path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "key_column": key_column,
+    }
+
+
+def _read_cache(csv_path: str, metadata: dict) -> Optional[LoanColumns]:
+    """Return the cached columns for ``csv_path`` if they are still valid.
+
+    Columns are memory-mapped read-only rather than read into memory.
+    """
+    directory = cache_path(csv_path)
+    try:
+        with open(os.path.join(directory, "meta.json")) as meta_file:
+            if json.load(meta_file) != metadata:
+                return None
+        names = list(_DATA_FIELDS)
+        if metadata["key_column"] is not None:
+            names.append("key")
+        columns = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+            for name in names
+        }
+    except (OSError, ValueError):
+        return None
+    return LoanColumns(**columns)
+
+
+def _write_cache(csv_path: str, metadata: dict, loans: LoanColumns) -> None:
+    """Store ``loans`` as one ``.npy`` file per column next to ``csv_path``.
+
+    The metadata is removed first and written last, each file being
+    replaced atomically, so an interrupted write never looks valid.
+    """
+    directory = cache_path(csv_path)
+    os.makedirs(directory, exist_ok=True)
+    meta_path = os.path.join(directory, "meta.json")
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    names = list(_DATA_FIELDS)
+    if loans.key is not None:
+        names.append("key")
+    for name in names:
+        path = os.path.join(directory, f"{name}.npy")
+        with open(path + ".tmp", "wb") as column_file:
+            np.save(column_file, getattr(loans, name))
+        os.replace(path + ".tmp", path)
+
+    with open(meta_path + ".tmp", "w") as meta_file:
+        json.dump(metadata, meta_file)
+    os.replace(meta_path + ".tmp", meta_path)
+
+
+def load_loans_cached(
+    csv_path: str, key_column: Optional[str] = None, rebuild: bool = False
+) -> LoanColumns:
+    """Load loans from ``csv_path`` through a binary column cache.
+
+    The first load parses the CSV and writes each column to a ``.npy`` file
+    in a sidecar directory (see :func:`cache_path`).  Later loads
+    memory-map those files instead of parsing, as long as the CSV's path,
+    size and modification time still match.  ``rebuild`` forces a fresh
+    parse.  If the cache cannot be written the parsed loans are returned
+    regardless.
+    """
+    metadata = _cache_metadata(csv_path, key_column)
+    if not rebuild:
+        cached = _read_cache(csv_path, metadata)
+        if cached is not None:
+            return cached
+
+    loans = load_loans(csv_path, key_column)
+    try:
+        _write_cache(csv_path, metadata, loans)
+    except OSError:
+        pass
+    return loans
+
+
+def iter_loan_chunks(
+    csv_path: str,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    key_column: Optional[str] = None,
+) -> Iterator[LoanColumns]:
+    """Yield the loans of ``csv_path`` in chunks of at most ``chunk_rows``.
+
+    Only one chunk of text and its parsed columns are held at a time, so
+    memory use does not grow with the size of the file.
+    """
+    if chunk_rows < 1:
+        raise ValueError(f"chunk_rows must be positive, got {chunk_rows}")
+    header = _read_header(csv_path)
+    with open(csv_path, newline="", encoding="utf-8") as csvfile:
+        next(csvfile, None)
+        while True:
+            lines = list(itertools.islice(csvfile, chunk_rows))
+            if not lines:
+                return
+            if any(line.strip() for line in lines):
+                yield _parse_loans(lines, header, 0, csv_path, key_column)
+
+
+class LoanSampler:
+    """Uniform random sample of at most ``max_loans`` from a stream of chunks.
+
+    Each row is given a pseudo-random priority derived from ``seed`` and its
+    position in the stream, and the rows with the lowest priorities are
+    kept.  Reading the same file in the same chunk size therefore always
+    yields the same sample, and rows appended later only displace sampled
+    rows when they win a place.
+    """
+
+    def __init__(self, max_loans: int, seed: int = 0) -> None:
+        if max_loans < 1:
+            raise ValueError(f"max_loans must be positive, got {max_loans}")
+        self.max_loans = max_loans
+        self.seed = seed
+        self._chunks = 0
+        self._rows = 0
+        self._loans = LoanColumns()
+        self._priorities = np.empty(0)
+        self._positions = np.empty(0, dtype=np.int64)
+
+    def add(self, chunk: LoanColumns) -> None:
+        """Offer every loan of ``chunk`` to the sample."""
+        rng = np.random.default_rng([self.seed, self._chunks])
+        priorities = np.concatenate([self._priorities, rng.random(len(chunk))])
+        positions = np.concatenate(
+            [self._positions, self._rows + np.arange(len(chunk))]
+        )
+        loans = concatenate_loans([self._loans, chunk])
+        self._chunks += 1
+        self._rows += len(chunk)
+
+        if len(loans) > self.max_loans:
+            keep = np.argpartition(priorities, self.max_loans - 1)
+            keep = keep[: self.max_loans]
+            loans = loans.take(keep)
+            priorities = priorities[keep]
+            positions = positions[keep]
+        self._loans, self._priorities, self._positions = loans, priorities, positions
+
+    def sample(self) -> LoanColumns:
+        """Return the sampled loans in the order they appear in the stream."""
+        return self._loans.take(np.argsort(self._positions, kind="stable"))
+
+
+def load_appended_loans(
+    csv_path: str, offset: int, key_column: Optional[str] = None
+) -> Tuple[LoanColumns, int]:
+    """Parse the complete rows written to ``csv_path`` after byte ``offset``.
+
+    An ``offset`` of zero reads the whole file, header included.  A trailing
+    row without its newline is treated as still being written and left for
+    the next call.  Returns the parsed loans and the offset just past the
+    last complete row, to be passed back in on the next call.
+    """
+    with open(csv_path, "rb") as csvfile:
+        header_line = csvfile.readline()
+        csvfile.seek(max(offset, len(header_line)))
+        data = csvfile.read()
+
+    data = data[: data.rfind(b"\n") + 1]
+    new_offset = max(offset, len(header_line)) + len(data)
+    if not data.strip():
+        return LoanColumns(), new_offset
+
+    header = next(csv.reader([header_line.decode("utf-8")]), [])
+    header = [name.strip() for name in header]
+    text = io.StringIO(data.decode("utf-8"))
+    loans = _parse_loans(text, header, 0, csv_path, key_column)
+    return loans, new_offset
+
+
+# Per-column minimum and maximum used to scale features into [0, 1].
+Bounds = Tuple[np.ndarray, np.ndarray]
+
+
+def feature_bounds(array: np.ndarray) -> Bounds:
+    """Return the per-column minimum and maximum of ``array``."""
+    return array.min(axis=0), array.max(axis=0)
+
+
+def scale_features(array: np.ndarray, bounds: Optional[Bounds] = None) -> np.ndarray:
+    """Scale the feature columns to the [0, 1] range.
+
+    ``bounds`` defaults to the minimum and maximum of ``array`` itself.
+    """
+    mins, maxs = feature_bounds(array) if bounds is None else bounds
+    ranges = maxs - mins
+    ranges[ranges == 0] = 1.0
+    return (array - mins) / ranges
+
+
+def loan_features(loans: LoanColumns) -> np.ndarray:
+    """Return the unscaled ``(term/age, balance, rate)`` of each loan."""
+    return np.column_stack((loans.term, loans.balance, loans.rate))
+
+
+def load_downsampled(
+    csv_path: str,
+    max_loans: int,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    key_column: Optional[str] = None,
+) -> Tuple[LoanColumns, Bounds]:
+    """Read ``csv_path`` in one streaming pass and return a sample of it.
+
+    Returns a uniform sample of at most ``max_loans`` loans together with
+    the feature bounds of *all* loans, so that the sample is scaled exactly
+    as the full portfolio would be.  Peak memory depends on ``max_loans``
+    and ``chunk_rows``, not on the size of the file.
+    """
+    sampler = LoanSampler(max_loans)
+    mins = maxs = None
+    for chunk in iter_loan_chunks(csv_path, chunk_rows, key_column):
+        chunk_mins, chunk_maxs = feature_bounds(loan_features(chunk))
+        if mins is None:
+            mins, maxs = chunk_mins, chunk_maxs
+        else:
+            mins = np.minimum(mins, chunk_mins)
+            maxs = np.maximum(maxs, chunk_maxs)
+        sampler.add(chunk)
+    if mins is None:
+        raise ValueError(f"{csv_path} contains no loans")
+    return sampler.sample(), (mins, maxs)
+
+
+def load_portfolio(
+    csv_path: str,
+    key_column: Optional[str] = None,
+    use_cache: bool = True,
+    rebuild_cache: bool = False,
+    max_loans: Optional[int] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Tuple[LoanColumns, Optional[Bounds]]:
+    """Load ``csv_path`` the way the command-line options ask for.
+
+    Returns the loans and, when only a sample of at most ``max_loans`` was
+    streamed in, the feature bounds of the whole file (``None`` otherwise).
+    """
+    if max_loans is not None:
+        return load_downsampled(csv_path, max_loans, chunk_rows, key_column)
+    if not use_cache:
+        return load_loans(csv_path, key_column), None
+    return load_loans_cached(csv_path, key_column, rebuild_cache), None
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    """Scramble the bits of a ``uint64`` array (SplitMix64 finalizer)."""
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def _row_hashes(loans: LoanColumns) -> np.ndarray:
+    """Return a ``uint64`` hash of the data in each loan row.
+
+    Identical rows are told apart by their order of occurrence, so the
+    result can serve as a unique key even when the CSV repeats rows.
+    """
+    hashes = np.zeros(len(loans), dtype=np.uint64)
+    for name in _DATA_FIELDS:
+        column = getattr(loans, name)
+        if column.dtype == np.float64:
+            bits = column.view(np.uint64)
+        else:
+            bits = column.astype(np.uint64)
+        hashes = _mix64(hashes ^ _mix64(bits))
+
+    order = np.argsort(hashes, kind="stable")
+    sorted_hashes = hashes[order]
+    positions = np.arange(len(loans))
+    starts = np.ones(len(loans), dtype=bool)
+    starts[1:] = sorted_hashes[1:] != sorted_hashes[:-1]
+    group_start = np.maximum.accumulate(np.where(starts, positions, 0))
+    occurrence = np.empty(len(loans), dtype=np.uint64)
+    occurrence[order] = positions - group_start
+    return hashes + occurrence * np.uint64(0x9E3779B97F4A7C15)
+
+
+def loan_keys(loans: LoanColumns) -> np.ndarray:
+    """Return a unique identity for every loan.
+
+    The key column is used when one was loaded; otherwise each row is
+    identified by a hash of its values.
+    """
+    if loans.key is None:
+        return _row_hashes(loans)
+    if len(np.unique(loans.key)) != len(loans.key):
+        raise ValueError("loan key column contains duplicate values")
+    return loans.key
+
+
+@dataclass
+class LoanDiff:
+    """Differences between two loan snapshots, as index arrays.
+
+    Attributes
+    ----------
+    removed : np.ndarray
+        Indices into the old snapshot of loans that no longer exist.
+    added : np.ndarray
+        Indices into the new snapshot of loans that did not exist before.
+    kept_old, kept_new : np.ndarray
+        Matching indices of loans present in both snapshots.
+    changed : np.ndarray
+        Boolean mask over the kept pairs whose values differ.
+    """
+
+    removed: np.ndarray
+    added: np.ndarray
+    kept_old: np.ndarray
+    kept_new: np.ndarray
+    changed: np.ndarray
+
+    def __bool__(self) -> bool:
+        return bool(len(self.removed) or len(self.added) or self.changed.any())
+
+
+def diff_loans(old: LoanColumns, new: LoanColumns) -> LoanDiff:
+    """Return the loans added, removed and changed between two snapshots.
+
+    Loans are matched on :func:`loan_keys`.  Without a key column a changed
+    row shows up as one removal and one addition.
+    """
+    old_keys = loan_keys(old)
+    new_keys = loan_keys(new)
+    _, kept_old, kept_new = np.intersect1d(
+        old_keys, new_keys, assume_unique=True, return_indices=True
+    )
+    removed = np.setdiff1d(np.arange(len(old)), kept_old, assume_unique=True)
+    added = np.setdiff1d(np.arange(len(new)), kept_new, assume_unique=True)
+
+    changed = np.zeros(len(kept_old), dtype=bool)
+    for name in _DATA_FIELDS:
+        changed |= getattr(old, name)[kept_old] != getattr(new, name)[kept_new]
+    return LoanDiff(removed, added, kept_old, kept_new, changed)
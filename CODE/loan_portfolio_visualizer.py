@@ -1,14 +1,62 @@
 from __future__ import annotations
 
 import argparse
-import csv
+import concurrent.futures
+import functools
+import glob
+import importlib.util
+import multiprocessing
 import os
-import random
+import queue
+import socket
+import sys
+import threading
 import time
-from typing import Iterable, List, Optional
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple, Union
 
 import numpy as np
-import open3d as o3d
+
+from file_watcher import DEFAULT_CHECK_INTERVAL, create_watcher
+from loan_data import (
+    DEFAULT_CHUNK_ROWS,
+    Bounds,
+    LoanColumns,
+    LoanDiff,
+    concatenate_loans,
+    diff_loans,
+    feature_bounds,
+    load_appended_loans,
+    load_downsampled,
+    load_loans,
+    load_portfolio,
+    loan_features,
+    read_header_line,
+    scale_features,
+)
+from loan_samples import DEFAULT_NUM_RECORDS, generate_sample_csv
+
+
+def _lazy_import(name: str):
+    """Return module ``name``, deferring its import until first attribute use."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+# Open3D takes seconds to import, so it is only loaded once geometry or a
+# window is actually needed; --help, sample generation and loading run on
+# NumPy alone.
+o3d = _lazy_import("open3d")
 
 
 def _add_axis_labels(vis: o3d.visualization.Visualizer, grid_size: float) -> None:
@@ -32,16 +80,15 @@ def _add_axis_labels(vis: o3d.visualization.Visualizer, grid_size: float) -> Non
         pass
 
 
-def add_face_titles(
-    vis: o3d.visualization.Visualizer,
+def _face_title_meshes(
     grid_size: float,
     scale: float = 0.07,
     color=(1.0, 1.0, 1.0),
-) -> None:
-    """Place one title on each positive-axis face of the grid."""
+) -> List[o3d.geometry.TriangleMesh]:
+    """Return one title mesh for each positive-axis face of the grid."""
 
     if not hasattr(o3d.geometry.TriangleMesh, "create_text_3d"):
-        return  # Old Open3D build – silently skip
+        return []  # Old Open3D build – silently skip
 
     eps = 0.03 * grid_size
     half = 0.5 * grid_size
@@ -52,10 +99,42 @@ def add_face_titles(
         ("Rate", [-eps, -eps, half]),
     ]
 
-    for text, pos in definitions:
-        mesh = _text_mesh(text, pos, scale=scale, color=color)
+    return [
+        _text_mesh(text, pos, scale=scale, color=color) for text, pos in definitions
+    ]
+
+
+def add_face_titles(
+    vis: o3d.visualization.Visualizer,
+    grid_size: float,
+    scale: float = 0.07,
+    color=(1.0, 1.0, 1.0),
+) -> None:
+    """Place one title on each positive-axis face of the grid."""
+    for mesh in _face_title_meshes(grid_size, scale, color):
         vis.add_geometry(mesh)
 
+
+@functools.lru_cache(maxsize=None)
+def _text_mesh_template(
+    text: str, scale: float, color: Optional[Tuple[float, ...]]
+) -> o3d.geometry.TriangleMesh:
+    """Return a scaled, colored text mesh at the origin.
+
+    Rasterizing the font is by far the slowest part of building the scene,
+    so each distinct ``(text, scale, color)`` is only rendered once.
+    """
+    mesh = o3d.geometry.TriangleMesh.create_text_3d(
+        text,
+        depth=0.01,
+        font_size=20,
+    )
+    if color is not None:
+        mesh.paint_uniform_color(list(color))
+    mesh.scale(scale, center=(0.0, 0.0, 0.0))
+    return mesh
+
+
 def _text_mesh(
     text: str,
     position: Iterable[float],
@@ -73,19 +152,51 @@ def _text_mesh(
         # Older Open3D versions (<0.20) do not support 3D text meshes.
         return None
 
-    mesh = o3d.geometry.TriangleMesh.create_text_3d(
-        text,
-        depth=0.01,
-        font_size=20,
-    )
-    if color is not None:
-        mesh.paint_uniform_color(list(color))
-    mesh.scale(scale, center=(0.0, 0.0, 0.0))
+    key = None if color is None else tuple(float(c) for c in color)
+    mesh = o3d.geometry.TriangleMesh(_text_mesh_template(text, scale, key))
     mesh.translate(list(position))
     return mesh
 
-# Default number of records used when generating sample data.
-DEFAULT_NUM_RECORDS = 500
+# Ways of turning loans into scene geometry: one mesh per loan, all loans
+# merged into a single mesh, one point per loan, or "auto" to pick between the
+# merged mesh and points based on the number of loans.
+RENDER_MODES = ("auto", "spheres", "mesh", "points")
+
+# Loan count above which the "auto" render mode switches to a point cloud.
+DEFAULT_POINT_CLOUD_THRESHOLD = 100_000
+
+# Sphere tessellation levels, finest first.  20 is Open3D's default.
+SPHERE_RESOLUTIONS = (20, 12, 8, 6, 4, 3)
+
+# Total sphere triangles the coarsest fitting tessellation level must stay under.
+DEFAULT_TRIANGLE_BUDGET = 5_000_000
+
+# Loans nearest the camera that are redrawn at full resolution on request.
+DEFAULT_NEAR_DETAIL_LOANS = 500
+
+# Camera eye positions and up vectors for headless snapshots, looking at the
+# middle of the unit cube the loans are scaled into.  "xy", "xz" and "yz" face
+# the plane of the same name; "iso" looks at all three.
+CAMERA_PRESETS = {
+    "iso": ([2.2, 1.7, 2.4], [0.0, 1.0, 0.0]),
+    "xy": ([0.55, 0.55, 2.8], [0.0, 1.0, 0.0]),
+    "xz": ([0.55, 2.8, 0.55], [0.0, 0.0, -1.0]),
+    "yz": ([2.8, 0.55, 0.55], [0.0, 1.0, 0.0]),
+}
+
+# Default size in pixels of headless snapshots.
+DEFAULT_SNAPSHOT_SIZE = (1280, 960)
+
+# Default upper limit on how often the interactive window is redrawn.
+DEFAULT_MAX_FPS = 20.0
+
+# Loop rate once nothing has changed for DEFAULT_IDLE_AFTER seconds.
+DEFAULT_IDLE_FPS = 4.0
+DEFAULT_IDLE_AFTER = 2.0
+
+# Upper bound on snapshot worker processes; each one holds its own renderer
+# and GPU context.
+MAX_SNAPSHOT_WORKERS = 4
 
 """Visualize loan portfolio data in 3D using Open3D.
 
@@ -93,183 +204,812 @@ This script requires the :mod:`open3d` package to be installed.
 """
 
 
-def load_loans(csv_path):
-    """Load loan data from a CSV file."""
-    loans = []
-    with open(csv_path, newline="") as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            loans.append(row)
-    return loans
-
-
-def _generate_clustered_loans(
-    num_records: int = DEFAULT_NUM_RECORDS, clusters: int = 4
-) -> List[dict]:
-    """Return a list of clustered loan records."""
-    records: List[dict] = []
-    base_balance_range = 100_000 - 1_000
-    base_rate_range = 12 - 4
-    base_term_range = 180 - 12
-    cluster_size = num_records // clusters
-
-    for idx in range(clusters):
-        size = cluster_size
-        if idx == clusters - 1:
-            size = num_records - len(records)
-        bal_center = random.uniform(1_000, 100_000)
-        rate_center = random.uniform(4, 12)
-        term_center = random.uniform(12, 180)
-        for _ in range(size):
-            balance = random.gauss(bal_center, base_balance_range / 20)
-            rate = random.gauss(rate_center, base_rate_range / 10)
-            term = random.gauss(term_center, base_term_range / 20)
-            balance = min(max(balance, 1_000), 100_000)
-            rate = min(max(rate, 4), 12)
-            term = int(min(max(term, 12), 180))
-            flag = "added" if random.random() < 0.5 else "removed"
-            records.append(
-                {
-                    "loanbalance": f"{balance:.2f}",
-                    "loanrate": f"{rate:.2f}",
-                    "loanaddedOrRemovedFlag": flag,
-                    "loantermOrAgeInMonths": str(term),
-                    "cluster": str(idx + 1),
-                }
-            )
-    random.shuffle(records)
-    return records
+def _loan_geometry_arrays(
+    loans: LoanColumns, bounds: Optional[Bounds] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return scaled centers, RGB colors and normalized balances for ``loans``.
 
+    ``bounds`` fixes the feature scaling, so that loans appended later can be
+    placed consistently with the ones already drawn.
+    """
+    points = scale_features(loan_features(loans), bounds)
 
-def generate_sample_csv(
-    path: str, num_records: int = DEFAULT_NUM_RECORDS, clusters: int = 4
-) -> None:
-    """Write clustered sample loan data to ``path``."""
-    fieldnames = [
-        "loanbalance",
-        "loanrate",
-        "loanaddedOrRemovedFlag",
-        "loantermOrAgeInMonths",
-        "cluster",
-    ]
-    data = _generate_clustered_loans(num_records=num_records, clusters=clusters)
-    with open(path, "w", newline="") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(data)
+    colors = np.zeros((len(loans), 3), dtype=float)
+    colors[loans.added, 1] = 1.0
+    colors[~loans.added, 0] = 1.0
 
+    # The balance is the Y feature, so its scaled value is the normalized balance.
+    normalized = points[:, 1].copy()
+    return points, colors, normalized
 
-def _scale_features(array: np.ndarray) -> np.ndarray:
-    """Scale the feature columns to the [0, 1] range."""
-    mins = array.min(axis=0)
-    maxs = array.max(axis=0)
-    ranges = maxs - mins
-    ranges[ranges == 0] = 1.0
-    return (array - mins) / ranges
 
+def _sphere_radii(normalized: np.ndarray) -> np.ndarray:
+    """Return sphere radii for balances normalized to [0, 1]."""
+    return 0.002 + 0.002 * normalized
 
-def loans_to_spheres(loans: Iterable[dict]) -> List[o3d.geometry.TriangleMesh]:
+
+def _sphere_triangle_count(resolution: int) -> int:
+    """Return the triangles in an Open3D sphere of the given resolution."""
+    return 4 * resolution * (resolution - 1)
+
+
+def _sphere_resolution(
+    loan_count: int, triangle_budget: int = DEFAULT_TRIANGLE_BUDGET
+) -> int:
+    """Return the finest sphere resolution keeping all loans within budget.
+
+    The spheres are only a few pixels wide at the default zoom, so coarse
+    tessellations look the same there while cutting the triangle count by
+    up to 60x on large portfolios.
+    """
+    for resolution in SPHERE_RESOLUTIONS:
+        if loan_count * _sphere_triangle_count(resolution) <= triangle_budget:
+            return resolution
+    return SPHERE_RESOLUTIONS[-1]
+
+
+@functools.lru_cache(maxsize=None)
+def _unit_sphere(resolution: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the vertices and triangles of an Open3D unit sphere."""
+    template = o3d.geometry.TriangleMesh.create_sphere(
+        radius=1.0, resolution=resolution
+    )
+    return np.array(template.vertices), np.array(template.triangles)
+
+
+def _sphere_buffers(
+    loans: LoanColumns, bounds: Optional[Bounds] = None, resolution: int = 20
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return per-loan sphere vertices, shared triangles and vertex colors.
+
+    One unit sphere is tessellated and its vertices are broadcast into a
+    preallocated ``(loans, vertices, 3)`` buffer, scaled by each loan's
+    radius and translated to its center.
+    """
+    points, colors, normalized = _loan_geometry_arrays(loans, bounds)
+    radii = _sphere_radii(normalized)
+
+    template_vertices, template_triangles = _unit_sphere(resolution)
+    count = len(points)
+    vertex_count = len(template_vertices)
+
+    vertices = np.empty((count, vertex_count, 3), dtype=float)
+    np.multiply(template_vertices, radii[:, None, None], out=vertices)
+    vertices += points[:, None, :]
+
+    vertex_colors = np.empty((count, vertex_count, 3), dtype=float)
+    vertex_colors[...] = colors[:, None, :]
+    return vertices, template_triangles, vertex_colors
+
+
+def _merge_sphere_buffers(
+    vertices: np.ndarray, triangles: np.ndarray, vertex_colors: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Flatten per-loan sphere buffers into the buffers of a single mesh."""
+    count, vertex_count, _ = vertices.shape
+    merged = np.empty((count, len(triangles), 3), dtype=np.int32)
+    offsets = np.arange(count, dtype=np.int32) * vertex_count
+    np.add(triangles, offsets[:, None, None], out=merged)
+    return (
+        vertices.reshape(-1, 3),
+        merged.reshape(-1, 3),
+        vertex_colors.reshape(-1, 3),
+    )
+
+
+def _point_buffers(
+    loans: LoanColumns, bounds: Optional[Bounds] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the points and colors of the point-cloud rendering."""
+    points, colors, normalized = _loan_geometry_arrays(loans, bounds)
+    colors *= (0.4 + 0.6 * normalized)[:, None]
+    return points, colors
+
+
+def _triangle_mesh(
+    vertices: np.ndarray, triangles: np.ndarray, vertex_colors: np.ndarray
+) -> o3d.geometry.TriangleMesh:
+    """Return a triangle mesh built from NumPy buffers."""
+    mesh = o3d.geometry.TriangleMesh()
+    mesh.vertices = o3d.utility.Vector3dVector(vertices)
+    mesh.triangles = o3d.utility.Vector3iVector(triangles)
+    mesh.vertex_colors = o3d.utility.Vector3dVector(vertex_colors)
+    return mesh
+
+
+def _point_cloud(points: np.ndarray, colors: np.ndarray) -> o3d.geometry.PointCloud:
+    """Return a colored point cloud built from NumPy buffers."""
+    cloud = o3d.geometry.PointCloud()
+    cloud.points = o3d.utility.Vector3dVector(points)
+    cloud.colors = o3d.utility.Vector3dVector(colors)
+    return cloud
+
+
+def loans_to_spheres(
+    loans: LoanColumns, bounds: Optional[Bounds] = None, resolution: int = 20
+) -> List[o3d.geometry.TriangleMesh]:
     """Create scaled spheres for each loan entry."""
-    points = []
-    colors = []
-    balances = []
-
-    for row in loans:
-        balance = float(row["loanbalance"])
-        rate = float(row["loanrate"])
-        term_or_age = float(row["loantermOrAgeInMonths"])
-        flag = row["loanaddedOrRemovedFlag"].strip().lower()
-        added = flag in ("added", "new", "1", "true", "yes")
-
-        points.append([term_or_age, balance, rate])
-        colors.append([0.0, 1.0, 0.0] if added else [1.0, 0.0, 0.0])
-        balances.append(balance)
-
-    points = _scale_features(np.array(points, dtype=float))
-    balances = np.array(balances, dtype=float)
-    min_balance = balances.min()
-    max_balance = balances.max()
-    balance_range = max_balance - min_balance or 1.0
-
-    spheres: List[o3d.geometry.TriangleMesh] = []
-    for idx, point in enumerate(points):
-        normalized = (balances[idx] - min_balance) / balance_range
-        radius = 0.002 + 0.002 * normalized
-        mesh = o3d.geometry.TriangleMesh.create_sphere(radius=radius)
-        mesh.translate(point)
-        mesh.paint_uniform_color(colors[idx])
-        spheres.append(mesh)
-
-    return spheres
-
-
-def _add_spheres_to_visualizer(
-    vis: o3d.visualization.Visualizer, spheres: List[o3d.geometry.TriangleMesh]
-) -> None:
-    """Add spheres and numerical labels to the visualizer."""
-    for idx, sphere in enumerate(spheres):
-        vis.add_geometry(sphere)
-        if idx < 99 and hasattr(vis, "add_3d_label"):
-            vis.add_3d_label(sphere.get_center(), str(idx + 1))
+    vertices, triangles, vertex_colors = _sphere_buffers(loans, bounds, resolution)
+    return [
+        _triangle_mesh(vertices[idx], triangles, vertex_colors[idx])
+        for idx in range(len(vertices))
+    ]
+
+
+def loans_to_mesh(
+    loans: LoanColumns, bounds: Optional[Bounds] = None, resolution: int = 20
+) -> o3d.geometry.TriangleMesh:
+    """Return every loan sphere merged into a single triangle mesh.
+
+    The result renders the same as :func:`loans_to_spheres` but is uploaded
+    to the GPU as one geometry instead of one per loan.
+    """
+    buffers = _merge_sphere_buffers(*_sphere_buffers(loans, bounds, resolution))
+    return _triangle_mesh(*buffers)
+
+
+def loans_to_point_cloud(
+    loans: LoanColumns, bounds: Optional[Bounds] = None
+) -> o3d.geometry.PointCloud:
+    """Return one point per loan for portfolios too large for spheres.
+
+    Points keep the green/red added/removed coloring; the balance that
+    drives sphere size in the other modes is encoded as color intensity,
+    with the smallest balances drawn at 40% brightness.
+    """
+    return _point_cloud(*_point_buffers(loans, bounds))
+
+
+def _resolve_render_mode(
+    render_mode: str, loan_count: int, point_cloud_threshold: int
+) -> str:
+    """Return the concrete render mode, resolving ``"auto"`` by loan count."""
+    if render_mode not in RENDER_MODES:
+        raise ValueError(f"render_mode must be one of {RENDER_MODES}")
+    if render_mode != "auto":
+        return render_mode
+    return "points" if loan_count > point_cloud_threshold else "mesh"
+
+
+@dataclass
+class GeometryBuffers:
+    """NumPy buffers for loan geometry in a resolved render mode.
+
+    Building these is the expensive part of a reload and needs no Open3D
+    objects, so it can happen away from the render thread; turning them into
+    geometry with :meth:`to_geometries` is a plain copy.
+
+    Attributes
+    ----------
+    mode : str
+        ``"spheres"``, ``"mesh"`` or ``"points"``.
+    vertices : np.ndarray
+        Per-loan sphere vertices ``(loans, vertices, 3)`` in sphere mode,
+        merged mesh vertices in mesh mode, or the points themselves.
+    colors : np.ndarray
+        Colors matching ``vertices``.
+    triangles : np.ndarray, optional
+        Shared sphere triangles in sphere mode, merged triangles in mesh
+        mode, and ``None`` for points.
+    """
+
+    mode: str
+    vertices: np.ndarray
+    colors: np.ndarray
+    triangles: Optional[np.ndarray] = None
+
+    @classmethod
+    def build(
+        cls, loans: LoanColumns, mode: str, bounds: Bounds, resolution: int = 20
+    ) -> GeometryBuffers:
+        """Return the buffers drawing ``loans`` in render ``mode``.
+
+        ``resolution`` sets the sphere tessellation of the mesh modes.
+        """
+        if mode == "spheres":
+            vertices, triangles, colors = _sphere_buffers(loans, bounds, resolution)
+        elif mode == "mesh":
+            vertices, triangles, colors = _merge_sphere_buffers(
+                *_sphere_buffers(loans, bounds, resolution)
+            )
+        else:
+            (vertices, colors), triangles = _point_buffers(loans, bounds), None
+        return cls(mode, vertices, colors, triangles)
+
+    def to_geometries(self) -> List[o3d.geometry.Geometry3D]:
+        """Return the Open3D geometry for these buffers.
+
+        Sphere mode yields one mesh per loan, in loan order; the merged
+        modes yield a single geometry.
+        """
+        if self.mode == "spheres":
+            return [
+                _triangle_mesh(vertices, self.triangles, colors)
+                for vertices, colors in zip(self.vertices, self.colors)
+            ]
+        if self.mode == "mesh":
+            return [_triangle_mesh(self.vertices, self.triangles, self.colors)]
+        return [_point_cloud(self.vertices, self.colors)]
+
+
+@dataclass
+class SceneUpdate:
+    """A change to the loan geometry, prepared but not yet applied.
+
+    Attributes
+    ----------
+    kind : str
+        ``"show"`` replaces all loan geometry with ``buffers``, ``"append"``
+        adds ``buffers`` after the existing loans, ``"diff"`` applies
+        ``diff`` to per-loan spheres and ``"refill"`` replaces the buffers
+        of the merged geometry in place.
+    loans, bounds, mode, resolution
+        The portfolio, feature bounds, render mode and sphere resolution
+        once applied.
+    buffers : GeometryBuffers, optional
+        New geometry: every loan for ``"show"`` and ``"refill"``, the
+        appended loans for ``"append"`` and the added loans for ``"diff"``.
+    changed_buffers : GeometryBuffers, optional
+        Replacement spheres for the changed loans of a ``"diff"``.
+    diff : LoanDiff, optional
+        Loan differences applied by a ``"diff"``.
+    start : int
+        Index of the first appended loan for ``"append"``.
+    """
+
+    kind: str
+    loans: LoanColumns
+    bounds: Bounds
+    mode: str
+    resolution: int
+    buffers: Optional[GeometryBuffers] = None
+    changed_buffers: Optional[GeometryBuffers] = None
+    diff: Optional[LoanDiff] = None
+    start: int = 0
+
+
+class LoanScene:
+    """Loan geometry shown in a visualizer and kept in sync with the data.
+
+    Only the loan geometry is owned here.  Grids, walls and labels added
+    around it are never touched when the portfolio is reloaded.
+
+    Changes go through two steps.  The ``prepare_*`` methods compute a
+    :class:`SceneUpdate` from NumPy data alone and may run on a worker
+    thread; :meth:`accept` records it as the portfolio later updates are
+    prepared against.  :meth:`apply` then swaps the geometry into the
+    visualizer and must run on the render thread, in the order the updates
+    were accepted.  :meth:`show`, :meth:`append` and :meth:`update` do all
+    three at once.
+
+    Spheres are tessellated as finely as ``triangle_budget`` allows for the
+    number of loans; :meth:`show_near_detail` can overlay full-resolution
+    spheres on the loans closest to the camera.
+    """
+
+    def __init__(
+        self,
+        vis: o3d.visualization.Visualizer,
+        render_mode: str = "auto",
+        point_cloud_threshold: int = DEFAULT_POINT_CLOUD_THRESHOLD,
+        triangle_budget: int = DEFAULT_TRIANGLE_BUDGET,
+    ) -> None:
+        self.vis = vis
+        self.render_mode = render_mode
+        self.point_cloud_threshold = point_cloud_threshold
+        self.triangle_budget = triangle_budget
+        self.loans = LoanColumns()
+        self.bounds: Optional[Bounds] = None
+        self.mode: Optional[str] = None
+        self.resolution = SPHERE_RESOLUTIONS[0]
+        self.geometries: List[o3d.geometry.Geometry3D] = []
+        # Render-thread view of the scene: the last applied update and the
+        # full-resolution overlay drawn near the camera, if any.
+        self._applied: Optional[SceneUpdate] = None
+        self._near_detail: Optional[o3d.geometry.TriangleMesh] = None
+
+    def _resolve(self, loan_count: int) -> Tuple[str, int]:
+        """Return the render mode and sphere resolution for ``loan_count``."""
+        mode = _resolve_render_mode(
+            self.render_mode, loan_count, self.point_cloud_threshold
+        )
+        if mode == "points":
+            # Points have no tessellation; keep the value fixed so that a
+            # changing loan count never forces a rebuild.
+            return mode, SPHERE_RESOLUTIONS[0]
+        return mode, _sphere_resolution(loan_count, self.triangle_budget)
+
+    def _keeps_layout(self, bounds: Bounds, loan_count: int) -> bool:
+        """Return whether loans scaled to ``bounds`` fit the current scene."""
+        if self.bounds is None:
+            return False
+        return (
+            self._resolve(loan_count) == (self.mode, self.resolution)
+            and np.array_equal(bounds[0], self.bounds[0])
+            and np.array_equal(bounds[1], self.bounds[1])
+        )
+
+    def prepare_show(
+        self, loans: LoanColumns, bounds: Optional[Bounds] = None
+    ) -> SceneUpdate:
+        """Prepare replacing all loan geometry with a fresh build of ``loans``.
+
+        ``bounds`` defaults to the feature bounds of ``loans``; pass the
+        bounds of the full portfolio when ``loans`` is only a sample of it.
+        """
+        if bounds is None:
+            bounds = feature_bounds(loan_features(loans))
+        mode, resolution = self._resolve(len(loans))
+        buffers = GeometryBuffers.build(loans, mode, bounds, resolution)
+        return SceneUpdate("show", loans, bounds, mode, resolution, buffers)
+
+    def prepare_append(self, new_loans: LoanColumns) -> Optional[SceneUpdate]:
+        """Prepare drawing appended loans on top of the existing ones.
+
+        Everything is rebuilt instead when the new loans extend the feature
+        bounds, since every existing loan would move, or when the resolved
+        render mode changes.  Returns ``None`` if there is nothing to add.
+        """
+        if len(new_loans) == 0:
+            return None
+        combined = concatenate_loans([self.loans, new_loans])
+        mins, maxs = feature_bounds(loan_features(new_loans))
+        inside = (
+            self.bounds is not None
+            and np.all(mins >= self.bounds[0])
+            and np.all(maxs <= self.bounds[1])
+        )
+        if not inside or not self._keeps_layout(self.bounds, len(combined)):
+            return self.prepare_show(combined)
+
+        buffers = GeometryBuffers.build(
+            new_loans, self.mode, self.bounds, self.resolution
+        )
+        return SceneUpdate(
+            "append",
+            combined,
+            self.bounds,
+            self.mode,
+            self.resolution,
+            buffers,
+            start=len(self.loans),
+        )
+
+    def prepare_update(
+        self, new_loans: LoanColumns, bounds: Optional[Bounds] = None
+    ) -> Optional[SceneUpdate]:
+        """Prepare applying only the differences with ``new_loans``.
+
+        In sphere mode removed loans are taken out, changed loans are
+        updated in place and added loans are drawn.  The merged modes refill
+        their single geometry in place.  A layout change (new feature bounds
+        or render mode) rebuilds all loan geometry.  Returns ``None`` if
+        nothing changed.  ``bounds`` is as for :meth:`prepare_show`.
+        """
+        diff = diff_loans(self.loans, new_loans)
+        if not diff:
+            return None
+
+        if bounds is None:
+            bounds = feature_bounds(loan_features(new_loans))
+        if not self._keeps_layout(bounds, len(new_loans)):
+            return self.prepare_show(new_loans, bounds)
+        mode, resolution = self.mode, self.resolution
+        if mode != "spheres":
+            buffers = GeometryBuffers.build(new_loans, mode, bounds, resolution)
+            return SceneUpdate(
+                "refill", new_loans, bounds, mode, resolution, buffers
+            )
+
+        changed = new_loans.take(diff.kept_new[diff.changed])
+        added = new_loans.take(diff.added)
+        return SceneUpdate(
+            "diff",
+            new_loans,
+            bounds,
+            mode,
+            resolution,
+            buffers=GeometryBuffers.build(added, mode, bounds, resolution),
+            changed_buffers=GeometryBuffers.build(changed, mode, bounds, resolution),
+            diff=diff,
+        )
+
+    def accept(self, update: SceneUpdate) -> None:
+        """Record ``update`` as the state later updates are prepared against."""
+        self.loans = update.loans
+        self.bounds = update.bounds
+        self.mode = update.mode
+        self.resolution = update.resolution
+
+    def apply(self, update: SceneUpdate, reset_bounding_box: bool = False) -> None:
+        """Swap the geometry of a prepared ``update`` into the visualizer.
+
+        Any near-camera detail overlay is dropped, as it may no longer match
+        the loans; call :meth:`show_near_detail` again to restore it.
+        """
+        self._applied = update
+        self._remove_near_detail()
+        if update.kind == "show":
+            for geometry in self.geometries:
+                self.vis.remove_geometry(geometry, reset_bounding_box=False)
+            if update.mode == "points":
+                self.vis.get_render_option().point_size = 3.0
+            self.geometries = update.buffers.to_geometries()
+            self._add_geometries(
+                self.geometries, 0, update.mode, reset_bounding_box
+            )
+        elif update.kind == "append" and update.mode != "spheres":
+            self._extend_merged(update.buffers)
+        elif update.kind == "append":
+            geometries = update.buffers.to_geometries()
+            self._add_geometries(geometries, update.start, update.mode)
+            self.geometries.extend(geometries)
+        elif update.kind == "diff":
+            self._apply_sphere_diff(update)
+        else:
+            self._refill_merged(update.buffers)
+
+    def show(
+        self,
+        loans: LoanColumns,
+        reset_bounding_box: bool = False,
+        bounds: Optional[Bounds] = None,
+    ) -> None:
+        """Replace all loan geometry with a fresh build of ``loans``."""
+        update = self.prepare_show(loans, bounds)
+        self.accept(update)
+        self.apply(update, reset_bounding_box)
+
+    def append(self, new_loans: LoanColumns) -> None:
+        """Draw loans appended to the portfolio on top of the existing ones."""
+        update = self.prepare_append(new_loans)
+        if update is not None:
+            self.accept(update)
+            self.apply(update)
+
+    def update(
+        self, new_loans: LoanColumns, bounds: Optional[Bounds] = None
+    ) -> None:
+        """Apply only the differences between the shown loans and ``new_loans``."""
+        update = self.prepare_update(new_loans, bounds)
+        if update is not None:
+            self.accept(update)
+            self.apply(update)
+
+    def show_near_detail(
+        self, camera_center: np.ndarray, count: int = DEFAULT_NEAR_DETAIL_LOANS
+    ) -> None:
+        """Overlay full-resolution spheres on the loans nearest the camera.
+
+        The coarse sphere of each of those loans lies entirely inside the
+        fine one, so the overlay simply hides it.  Nothing is drawn when the
+        spheres already use the finest resolution or loans are points.
+        """
+        self._remove_near_detail()
+        update = self._applied
+        if (
+            update is None
+            or update.mode == "points"
+            or update.resolution == SPHERE_RESOLUTIONS[0]
+            or len(update.loans) == 0
+        ):
+            return
+
+        points, _, _ = _loan_geometry_arrays(update.loans, update.bounds)
+        distances = np.sum((points - camera_center) ** 2, axis=1)
+        count = min(count, len(distances))
+        nearest = np.argpartition(distances, count - 1)[:count]
+        self._near_detail = loans_to_mesh(
+            update.loans.take(nearest), update.bounds, SPHERE_RESOLUTIONS[0]
+        )
+        self.vis.add_geometry(self._near_detail, reset_bounding_box=False)
+
+    def _remove_near_detail(self) -> None:
+        if self._near_detail is not None:
+            self.vis.remove_geometry(self._near_detail, reset_bounding_box=False)
+            self._near_detail = None
+
+    def _add_geometries(
+        self,
+        geometries: List[o3d.geometry.Geometry3D],
+        start: int,
+        mode: str,
+        reset_bounding_box: bool = False,
+    ) -> None:
+        """Add ``geometries`` and, for spheres, their numerical labels.
+
+        ``start`` is the index of the first geometry within the portfolio,
+        so that loans added later continue the label numbering.
+        """
+        for idx, geometry in enumerate(geometries, start):
+            self.vis.add_geometry(geometry, reset_bounding_box=reset_bounding_box)
+            if mode == "spheres" and idx < 99 and hasattr(self.vis, "add_3d_label"):
+                self.vis.add_3d_label(geometry.get_center(), str(idx + 1))
+
+    def _apply_sphere_diff(self, update: SceneUpdate) -> None:
+        """Remove, update and add per-loan spheres as described by ``update``."""
+        diff = update.diff
+        old_spheres = self.geometries
+        spheres: List[Optional[o3d.geometry.TriangleMesh]] = [None] * len(
+            update.loans
+        )
+        for old_idx, new_idx in zip(diff.kept_old, diff.kept_new):
+            spheres[new_idx] = old_spheres[old_idx]
+
+        for old_idx in diff.removed:
+            self.vis.remove_geometry(old_spheres[old_idx], reset_bounding_box=False)
+
+        changed = diff.kept_new[diff.changed]
+        source = update.changed_buffers
+        for new_idx, vertices, colors in zip(changed, source.vertices, source.colors):
+            sphere = spheres[new_idx]
+            sphere.vertices = o3d.utility.Vector3dVector(vertices)
+            sphere.vertex_colors = o3d.utility.Vector3dVector(colors)
+            self.vis.update_geometry(sphere)
+
+        added = update.buffers.to_geometries()
+        for new_idx, sphere in zip(diff.added, added):
+            spheres[new_idx] = sphere
+            self._add_geometries([sphere], int(new_idx), update.mode)
+
+        self.geometries = spheres
+
+    def _extend_merged(self, buffers: GeometryBuffers) -> None:
+        """Append ``buffers`` to the merged geometry's buffers in place.
+
+        Keeps the merged modes at a single geometry however many times
+        loans are appended; new triangle indices are shifted by the number
+        of vertices already there.
+        """
+        target = self.geometries[0]
+        if buffers.mode == "mesh":
+            offset = len(target.vertices)
+            target.vertices.extend(o3d.utility.Vector3dVector(buffers.vertices))
+            target.triangles.extend(
+                o3d.utility.Vector3iVector(buffers.triangles + offset)
+            )
+            target.vertex_colors.extend(o3d.utility.Vector3dVector(buffers.colors))
+        else:
+            target.points.extend(o3d.utility.Vector3dVector(buffers.vertices))
+            target.colors.extend(o3d.utility.Vector3dVector(buffers.colors))
+        self.vis.update_geometry(target)
+
+    def _refill_merged(self, buffers: GeometryBuffers) -> None:
+        """Replace the merged geometry's buffers in place."""
+        target = self.geometries[0]
+        if buffers.mode == "mesh":
+            target.vertices = o3d.utility.Vector3dVector(buffers.vertices)
+            target.triangles = o3d.utility.Vector3iVector(buffers.triangles)
+            target.vertex_colors = o3d.utility.Vector3dVector(buffers.colors)
+        else:
+            target.points = o3d.utility.Vector3dVector(buffers.vertices)
+            target.colors = o3d.utility.Vector3dVector(buffers.colors)
+        self.vis.update_geometry(target)
+
+
+class BackgroundReloader:
+    """Reload the loan CSV and prepare scene updates on a worker thread.
+
+    :meth:`request` is called from the render thread whenever the file
+    changes.  The worker parses the file, diffs it against the scene and
+    builds the geometry buffers, then queues the finished
+    :class:`SceneUpdate`; :meth:`poll` hands queued updates back to the
+    render thread to apply.  If another change is requested while a reload
+    is in progress, that reload is abandoned and restarted on the newer file
+    instead of queueing stale work.
+
+    The reloader also acts as a file descriptor (see :meth:`fileno`) that
+    becomes readable whenever an update is queued, so the render loop can
+    wait on it alongside the file watcher and apply updates immediately.
+    """
+
+    def __init__(
+        self,
+        scene: LoanScene,
+        csv_path: str,
+        key_column: Optional[str] = None,
+        incremental: bool = False,
+        offset: int = 0,
+        header_line: bytes = b"",
+        max_loans: Optional[int] = None,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    ) -> None:
+        self.scene = scene
+        self.csv_path = csv_path
+        self.key_column = key_column
+        self.incremental = incremental
+        self.max_loans = max_loans
+        self.chunk_rows = chunk_rows
+        self._offset = offset
+        self._header_line = header_line
+        self._requested = 0
+        self._done = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._updates: queue.Queue[SceneUpdate] = queue.Queue()
+        # A socket pair rather than a pipe, so that select() accepts it on
+        # every platform.
+        self._wake_reader, self._wake_writer = socket.socketpair()
+        self._wake_reader.setblocking(False)
+        self._wake_writer.setblocking(False)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def request(self) -> None:
+        """Ask for the file to be reloaded, superseding any reload in progress."""
+        with self._condition:
+            self._requested += 1
+            self._condition.notify()
+
+    @property
+    def pending(self) -> bool:
+        """Whether a requested reload has yet to be handed over by :meth:`poll`."""
+        with self._condition:
+            if self._requested != self._done:
+                return True
+        return not self._updates.empty()
+
+    def fileno(self) -> int:
+        """Return a descriptor that is readable while updates are queued."""
+        return self._wake_reader.fileno()
+
+    def poll(self) -> List[SceneUpdate]:
+        """Return the updates finished since the last call, oldest first."""
+        # Drain the wake-up signal before the queue, so that an update queued
+        # meanwhile leaves its signal behind rather than losing it.
+        try:
+            while self._wake_reader.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+        updates = []
+        while True:
+            try:
+                updates.append(self._updates.get_nowait())
+            except queue.Empty:
+                return updates
+
+    def close(self) -> None:
+        """Stop the worker thread once its current step finishes."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        self._wake_reader.close()
+        self._wake_writer.close()
+
+    def _stale(self, version: int) -> bool:
+        with self._condition:
+            return self._closed or self._requested != version
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._closed and self._requested == self._done:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                version = self._requested
+            try:
+                self._reload(version)
+            except (OSError, ValueError) as exc:
+                print(f"Could not reload {self.csv_path}: {exc}")
+            if not self._stale(version):
+                self._done = version
+
+    def _reload(self, version: int) -> None:
+        """Prepare and queue the update for request ``version``.
+
+        Nothing is recorded unless the reload completes before a newer
+        request arrives, so an abandoned reload leaves no trace.
+        """
+        offset, header_line = self._offset, self._header_line
+        appended = False
+        bounds = None
+        if self.max_loans is not None:
+            loans, bounds = load_downsampled(
+                self.csv_path, self.max_loans, self.chunk_rows, self.key_column
+            )
+        elif self.incremental:
+            # Only parse the rows appended since the last update, unless the
+            # file was truncated or rewritten with a new header.
+            if (
+                os.path.getsize(self.csv_path) >= offset
+                and read_header_line(self.csv_path) == header_line
+            ):
+                loans, offset = load_appended_loans(
+                    self.csv_path, offset, self.key_column
+                )
+                appended = True
+            else:
+                header_line = read_header_line(self.csv_path)
+                loans, offset = load_appended_loans(
+                    self.csv_path, 0, self.key_column
+                )
+        else:
+            loans = load_loans(self.csv_path, self.key_column)
+        if self._stale(version):
+            return
+
+        if appended:
+            update = self.scene.prepare_append(loans)
+        else:
+            update = self.scene.prepare_update(loans, bounds)
+        if self._stale(version):
+            return
+
+        self._offset, self._header_line = offset, header_line
+        if update is not None:
+            self.scene.accept(update)
+            self._updates.put(update)
+            try:
+                self._wake_writer.send(b"\0")
+            except BlockingIOError:
+                # The buffer is full of earlier signals the loop has yet
+                # to drain; it will wake up regardless.
+                pass
+
+
+# Indices of the two coordinate axes spanning each principal plane.
+_PLANE_AXES = {"xy": (0, 1), "xz": (0, 2), "yz": (1, 2)}
+
+
+def _grid_points(
+    size: float, divisions: int, plane: str, positive_only: bool
+) -> np.ndarray:
+    """Return the line endpoints of a grid, two consecutive rows per line.
+
+    Lines parallel to the plane's first axis come first, then those
+    parallel to its second axis, each ordered by their offset.
+    """
+    plane = plane.lower()
+    if plane not in _PLANE_AXES:
+        raise ValueError("plane must be 'xy', 'xz', or 'yz'")
+    first, second = _PLANE_AXES[plane]
+    step = size / divisions
+    origin = 0.0 if positive_only else -size / 2
+    ticks = origin + np.arange(divisions + 1) * step
+
+    # Indexed by (family, line, endpoint, coordinate).
+    points = np.zeros((2, divisions + 1, 2, 3))
+    points[0, :, 0, first] = origin
+    points[0, :, 1, first] = origin + size
+    points[0, :, :, second] = ticks[:, None]
+    points[1, :, :, first] = ticks[:, None]
+    points[1, :, 0, second] = origin
+    points[1, :, 1, second] = origin + size
+    return points.reshape(-1, 3)
 
 
 def _create_grid(
     size: float = 1.0,
     divisions: int = 10,
-    plane: str = "xy",
+    plane: Union[str, Iterable[str]] = "xy",
     positive_only: bool = False,
 ) -> o3d.geometry.LineSet:
-    """Return a faint grid in one of the principal planes.
+    """Return a faint grid in one or more of the principal planes.
 
     Parameters
     ----------
     size : float
         Length of a side of the grid.
     divisions : int
-        Number of grid segments.
-    plane : str
-        Plane in which to build the grid ("xy", "xz", or "yz").
+        Number of grid segments.  Thousands of divisions are fine for dense
+        measurement overlays.
+    plane : str or iterable of str
+        Plane in which to build the grid ("xy", "xz", or "yz"), or several
+        planes to combine into a single line set.
     positive_only : bool
         If true, the grid originates at 0 instead of being centered."""
-    plane = plane.lower()
-    if plane not in ("xy", "xz", "yz"):
-        raise ValueError("plane must be 'xy', 'xz', or 'yz'")
-    points = []
-    lines = []
-    step = size / divisions
-    origin = 0.0 if positive_only else -size / 2
-
-    # Lines parallel to the first axis in the plane
-    for i in range(divisions + 1):
-        if plane == "xy":
-            start = [origin, origin + i * step, 0.0]
-            end = [origin + size, origin + i * step, 0.0]
-        elif plane == "xz":
-            start = [origin, 0.0, origin + i * step]
-            end = [origin + size, 0.0, origin + i * step]
-        else:  # yz
-            start = [0.0, origin, origin + i * step]
-            end = [0.0, origin + size, origin + i * step]
-        points.extend([start, end])
-        lines.append([len(points) - 2, len(points) - 1])
-
-    # Lines parallel to the second axis in the plane
-    for i in range(divisions + 1):
-        if plane == "xy":
-            start = [origin + i * step, origin, 0.0]
-            end = [origin + i * step, origin + size, 0.0]
-        elif plane == "xz":
-            start = [origin + i * step, 0.0, origin]
-            end = [origin + i * step, 0.0, origin + size]
-        else:  # yz
-            start = [0.0, origin + i * step, origin]
-            end = [0.0, origin + i * step, origin + size]
-        points.extend([start, end])
-        lines.append([len(points) - 2, len(points) - 1])
+    planes = [plane] if isinstance(plane, str) else list(plane)
+    points = np.concatenate(
+        [_grid_points(size, divisions, name, positive_only) for name in planes]
+    )
+    lines = np.arange(len(points), dtype=np.int32).reshape(-1, 2)
 
     line_set = o3d.geometry.LineSet()
-    line_set.points = o3d.utility.Vector3dVector(np.asarray(points))
-    line_set.lines = o3d.utility.Vector2iVector(np.asarray(lines))
+    line_set.points = o3d.utility.Vector3dVector(points)
+    line_set.lines = o3d.utility.Vector2iVector(lines)
     colors = np.tile([0.7, 0.7, 0.7], (len(lines), 1))
     line_set.colors = o3d.utility.Vector3dVector(colors)
     return line_set
@@ -321,162 +1061,728 @@ def _create_wall_text(
 
 
 
-def main() -> None:
-    parser = argparse.ArgumentParser(
-        description="Visualize loan portfolio data and monitor for updates"
-    )
-    parser.add_argument("csv_file", help="CSV file containing loan data")
-    args = parser.parse_args()
+def _camera_center(vis: o3d.visualization.Visualizer) -> np.ndarray:
+    """Return the position of the visualizer's camera in world coordinates."""
+    params = vis.get_view_control().convert_to_pinhole_camera_parameters()
+    extrinsic = np.asarray(params.extrinsic)
+    rotation, translation = extrinsic[:3, :3], extrinsic[:3, 3]
+    return -rotation.T @ translation
 
-    csv_path = args.csv_file
-    answer = input(
-        f"Generate a new dataset with {DEFAULT_NUM_RECORDS:,d} sample records? [y/N]: "
-    ).strip().lower()
-    if answer == "y" or (answer == "" and not os.path.exists(csv_path)):
-        generate_sample_csv(csv_path)
-        print(f"Sample data written to {csv_path}")
 
-    loans = load_loans(csv_path)
-    spheres = loans_to_spheres(loans)
+class FrameGovernor:
+    """Decide when the window must be redrawn and how long to wait between frames.
 
-    vis = o3d.visualization.Visualizer()
-    vis.create_window(window_name="Loan Portfolio")
-    _add_spheres_to_visualizer(vis, spheres)
-    grid_size = 1.1
-
-    grid_xy = _create_grid(size=grid_size, divisions=10, plane="xy", positive_only=True)
-    grid_xz = _create_grid(size=grid_size, divisions=10, plane="xz", positive_only=True)
-    grid_yz = _create_grid(size=grid_size, divisions=10, plane="yz", positive_only=True)
-    wall_xy = _create_background_wall(
-        grid_size,
-        grid_size,
-        0.001,
-        [0.0, 0.0, -0.001],
-        "xy",
-    )
-    wall_xz = _create_background_wall(
-        grid_size,
-        0.001,
-        grid_size,
-        [0.0, -0.001, 0.0],
-        "xz",
-    )
-    wall_yz = _create_background_wall(
-        0.001,
-        grid_size,
-        grid_size,
-        [-0.001, 0.0, 0.0],
-        "yz",
-    )
+    Open3D redraws the window by itself while the camera is being moved, so
+    an explicit redraw is only needed when geometry changed.  Such redraws
+    are limited to ``max_fps``.  The loop runs at ``max_fps`` while the scene
+    or the camera is changing, and slows to ``idle_fps`` once neither has
+    changed for ``idle_after`` seconds.
+    """
 
-    wall_label = _create_wall_text(
-        "Loan Portfolio",
-        [0.05 * grid_size, 0.05 * grid_size, -0.0005],
-        plane="xy",
-        scale=0.08,
-    )
+    def __init__(
+        self,
+        max_fps: float = DEFAULT_MAX_FPS,
+        idle_fps: float = DEFAULT_IDLE_FPS,
+        idle_after: float = DEFAULT_IDLE_AFTER,
+        clock=time.monotonic,
+    ) -> None:
+        self.frame_interval = 1.0 / max_fps
+        self.idle_interval = max(1.0 / idle_fps, self.frame_interval)
+        self.idle_after = idle_after
+        self._clock = clock
+        self._dirty = True
+        self._last_activity = clock()
+        self._last_render = float("-inf")
+
+    def activity(self) -> None:
+        """Record user interaction that Open3D redraws on its own."""
+        self._last_activity = self._clock()
+
+    def invalidate(self) -> None:
+        """Record a geometry change that needs an explicit redraw."""
+        self._dirty = True
+        self._last_activity = self._clock()
+
+    @property
+    def idle(self) -> bool:
+        return self._clock() - self._last_activity >= self.idle_after
+
+    def should_render(self) -> bool:
+        """Return whether to redraw now, and if so count it as done."""
+        now = self._clock()
+        if not self._dirty or now - self._last_render < self.frame_interval:
+            return False
+        self._dirty = False
+        self._last_render = now
+        return True
+
+    def timeout(self) -> float:
+        """Return how long the loop should wait before the next frame."""
+        if self._dirty or not self.idle:
+            return self.frame_interval
+        return self.idle_interval
+
+
+class SceneScaffold:
+    """Grids, background walls, labels and axes drawn around the loans.
+
+    The geometry is built once and can be attached to any number of
+    visualizers, or re-attached after they are cleared, without being
+    recomputed.  Use :func:`scene_scaffold` to share one instance per grid
+    configuration.
+    """
 
-    axis = o3d.geometry.TriangleMesh.create_coordinate_frame(size=0.2)
-    vis.add_geometry(grid_xy)
-    vis.add_geometry(grid_xz)
-    vis.add_geometry(grid_yz)
-    vis.add_geometry(wall_xy)
-    vis.add_geometry(wall_xz)
-    vis.add_geometry(wall_yz)
+    def __init__(self, grid_size: float = 1.1, divisions: int = 10) -> None:
+        self.grid_size = grid_size
+        self.divisions = divisions
+        self.geometries = self._build()
+
+    def _build(self) -> List[o3d.geometry.Geometry3D]:
+        grid_size = self.grid_size
+        divisions = self.divisions
+        grids = _create_grid(
+            size=grid_size,
+            divisions=divisions,
+            plane=("xy", "xz", "yz"),
+            positive_only=True,
+        )
+        wall_xy = _create_background_wall(
+            grid_size,
+            grid_size,
+            0.001,
+            [0.0, 0.0, -0.001],
+            "xy",
+        )
+        wall_xz = _create_background_wall(
+            grid_size,
+            0.001,
+            grid_size,
+            [0.0, -0.001, 0.0],
+            "xz",
+        )
+        wall_yz = _create_background_wall(
+            0.001,
+            grid_size,
+            grid_size,
+            [-0.001, 0.0, 0.0],
+            "yz",
+        )
+
+        wall_label = _create_wall_text(
+            "Loan Portfolio",
+            [0.05 * grid_size, 0.05 * grid_size, -0.0005],
+            plane="xy",
+            scale=0.08,
+        )
+
+        axis = o3d.geometry.TriangleMesh.create_coordinate_frame(size=0.2)
+        geometries = [grids, wall_xy, wall_xz, wall_yz]
+        if wall_label is not None:
+            geometries.append(wall_label)
+        geometries.append(axis)
+        geometries.extend(_face_title_meshes(grid_size))
+        return geometries
+
+    def attach(
+        self, vis: o3d.visualization.Visualizer, reset_bounding_box: bool = True
+    ) -> None:
+        """Add the scaffold geometry to ``vis``."""
+        for geometry in self.geometries:
+            vis.add_geometry(geometry, reset_bounding_box=reset_bounding_box)
+
+    def detach(self, vis: o3d.visualization.Visualizer) -> None:
+        """Remove the scaffold geometry from ``vis``."""
+        for geometry in self.geometries:
+            vis.remove_geometry(geometry, reset_bounding_box=False)
+
+
+@functools.lru_cache(maxsize=None)
+def scene_scaffold(grid_size: float = 1.1, divisions: int = 10) -> SceneScaffold:
+    """Return the shared scaffold for a grid configuration, built on first use."""
+    return SceneScaffold(grid_size, divisions)
+
+
+class SnapshotRenderer:
+    """Render loan portfolios to image files without opening a window.
+
+    A single Open3D :class:`~open3d.visualization.rendering.OffscreenRenderer`
+    is created and reused for every portfolio: the scaffolding is added
+    once and only the loan geometry is swapped between files.  It renders
+    through EGL, or on the CPU with an OSMesa build of Open3D, so no display
+    is needed.
+    """
 
-    if wall_label is not None:
-        vis.add_geometry(wall_label)
+    def __init__(
+        self,
+        width: int = DEFAULT_SNAPSHOT_SIZE[0],
+        height: int = DEFAULT_SNAPSHOT_SIZE[1],
+        render_mode: str = "auto",
+        point_cloud_threshold: int = DEFAULT_POINT_CLOUD_THRESHOLD,
+        triangle_budget: int = DEFAULT_TRIANGLE_BUDGET,
+    ) -> None:
+        from open3d.visualization import rendering
+
+        self.render_mode = render_mode
+        self.point_cloud_threshold = point_cloud_threshold
+        self.triangle_budget = triangle_budget
+        self.renderer = rendering.OffscreenRenderer(width, height)
+        self.renderer.scene.set_background([1.0, 1.0, 1.0, 1.0])
+
+        self._lit = rendering.MaterialRecord()
+        self._lit.shader = "defaultLit"
+        self._unlit = rendering.MaterialRecord()
+        self._unlit.shader = "defaultUnlit"
+        self._points = rendering.MaterialRecord()
+        self._points.shader = "defaultUnlit"
+        self._points.point_size = 3.0
+        self._lines = rendering.MaterialRecord()
+        self._lines.shader = "unlitLine"
+        self._lines.line_width = 1.0
+
+        for idx, geometry in enumerate(scene_scaffold().geometries):
+            material = (
+                self._lines
+                if isinstance(geometry, o3d.geometry.LineSet)
+                else self._unlit
+            )
+            self.renderer.scene.add_geometry(f"scaffold-{idx}", geometry, material)
+        self._has_loans = False
+
+    def _show_loans(self, loans: LoanColumns, bounds: Optional[Bounds]) -> None:
+        """Replace the loan geometry in the scene with ``loans``."""
+        if self._has_loans:
+            self.renderer.scene.remove_geometry("loans")
+        if bounds is None:
+            bounds = feature_bounds(loan_features(loans))
+        mode = _resolve_render_mode(
+            self.render_mode, len(loans), self.point_cloud_threshold
+        )
+        if mode == "spheres":
+            # Merged spheres look identical and are one draw call.
+            mode = "mesh"
+        resolution = _sphere_resolution(len(loans), self.triangle_budget)
+        (geometry,) = GeometryBuffers.build(
+            loans, mode, bounds, resolution
+        ).to_geometries()
+        if mode == "mesh":
+            geometry.compute_vertex_normals()
+            material = self._lit
+        else:
+            material = self._points
+        self.renderer.scene.add_geometry("loans", geometry, material)
+        self._has_loans = True
+
+    def render(
+        self,
+        loans: LoanColumns,
+        outputs: Iterable[Tuple[str, str]],
+        bounds: Optional[Bounds] = None,
+    ) -> None:
+        """Render ``loans`` once per ``(camera preset, image path)`` pair."""
+        self._show_loans(loans, bounds)
+        for preset, path in outputs:
+            eye, up = CAMERA_PRESETS[preset]
+            self.renderer.setup_camera(60.0, [0.55, 0.55, 0.55], eye, up)
+            o3d.io.write_image(path, self.renderer.render_to_image())
+
+
+def snapshot_paths(
+    csv_path: str, output_dir: str, presets: Iterable[str]
+) -> List[Tuple[str, str]]:
+    """Return ``(preset, image path)`` pairs for the snapshots of ``csv_path``."""
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return [
+        (preset, os.path.join(output_dir, f"{stem}_{preset}.png"))
+        for preset in presets
+    ]
 
-    vis.add_geometry(axis)
-    add_face_titles(vis, grid_size)
 
-    vis.poll_events()
-    vis.update_renderer()
+@dataclass
+class SnapshotResult:
+    """Outcome and timings of rendering one CSV file to snapshots."""
 
-    try:
-        last_mtime = os.path.getmtime(csv_path)
-        prev_loans = loans
-        check_interval = 5.0
-        last_check = time.time()
+    csv_path: str
+    images: List[str]
+    loans: int = 0
+    load_seconds: float = 0.0
+    render_seconds: float = 0.0
+    error: Optional[str] = None
 
-        while True:
-            vis.poll_events()
-            vis.update_renderer()
-            time.sleep(0.05)
+    @property
+    def total_seconds(self) -> float:
+        return self.load_seconds + self.render_seconds
 
-            if time.time() - last_check < check_interval:
-                continue
-            last_check = time.time()
 
-            try:
-                mtime = os.path.getmtime(csv_path)
-            except OSError:
-                continue
-
-            if mtime == last_mtime:
-                continue
-            last_mtime = mtime
-
-            new_loans = load_loans(csv_path)
-            if new_loans == prev_loans:
-                continue
-            prev_loans = new_loans
-
-            camera = vis.get_view_control().convert_to_pinhole_camera_parameters()
-            vis.clear_geometries()
-
-            spheres = loans_to_spheres(new_loans)
-            _add_spheres_to_visualizer(vis, spheres)
-            grid_xy = _create_grid(size=grid_size, divisions=10, plane="xy", positive_only=True)
-            grid_xz = _create_grid(size=grid_size, divisions=10, plane="xz", positive_only=True)
-            grid_yz = _create_grid(size=grid_size, divisions=10, plane="yz", positive_only=True)
-            wall_xy = _create_background_wall(
-                grid_size,
-                grid_size,
-                0.001,
-                [0.0, 0.0, -0.001],
-                "xy",
-            )
-            wall_xz = _create_background_wall(
-                grid_size,
-                0.001,
-                grid_size,
-                [0.0, -0.001, 0.0],
-                "xz",
-            )
-            wall_yz = _create_background_wall(
-                0.001,
-                grid_size,
-                grid_size,
-                [-0.001, 0.0, 0.0],
-                "yz",
-            )
+def expand_csv_paths(patterns: Iterable[str]) -> List[str]:
+    """Expand directories and glob patterns into a list of CSV paths.
 
-            wall_label = _create_wall_text(
-                "Loan Portfolio",
-                [0.05 * grid_size, 0.05 * grid_size, -0.0005],
-                plane="xy",
-                scale=0.08,
+    A directory stands for every ``*.csv`` file directly inside it.  Plain
+    paths are kept as they are so that missing files are reported later.
+    """
+    paths: List[str] = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.extend(sorted(glob.glob(os.path.join(pattern, "*.csv"))))
+        elif glob.has_magic(pattern):
+            paths.extend(sorted(glob.glob(pattern)))
+        else:
+            paths.append(pattern)
+    return paths
+
+
+def _render_snapshot(
+    renderer: SnapshotRenderer,
+    csv_path: str,
+    output_dir: str,
+    presets: List[str],
+    load_options: dict,
+) -> SnapshotResult:
+    """Load and render one file, recording how long each step took."""
+    outputs = snapshot_paths(csv_path, output_dir, presets)
+    result = SnapshotResult(csv_path, [])
+    start = time.perf_counter()
+    try:
+        loans, bounds = load_portfolio(csv_path, **load_options)
+        loaded = time.perf_counter()
+        result.loans = len(loans)
+        result.load_seconds = loaded - start
+        renderer.render(loans, outputs, bounds)
+        result.render_seconds = time.perf_counter() - loaded
+    except (OSError, ValueError) as exc:
+        result.error = str(exc)
+        return result
+    result.images = [path for _, path in outputs]
+    return result
+
+
+# Renderer owned by a snapshot worker process, created once by the pool
+# initializer and reused for every file the worker is given.
+_worker_renderer: Optional[SnapshotRenderer] = None
+
+
+def _init_snapshot_worker(renderer_options: dict) -> None:
+    global _worker_renderer
+    _worker_renderer = SnapshotRenderer(**renderer_options)
+
+
+def _snapshot_worker_task(
+    csv_path: str, output_dir: str, presets: List[str], load_options: dict
+) -> SnapshotResult:
+    return _render_snapshot(
+        _worker_renderer, csv_path, output_dir, presets, load_options
+    )
+
+
+def render_snapshots(
+    csv_paths: Iterable[str],
+    output_dir: str,
+    presets: Iterable[str] = ("iso",),
+    renderer: Optional[SnapshotRenderer] = None,
+    workers: int = 1,
+    renderer_options: Optional[dict] = None,
+    **load_options,
+) -> List[SnapshotResult]:
+    """Render every CSV in ``csv_paths`` to PNGs in ``output_dir``.
+
+    One image is written per camera preset, named ``<csv stem>_<preset>.png``.
+    ``load_options`` are passed on to :func:`load_portfolio`.  With more than
+    one worker the files are spread over a process pool in which every
+    process keeps its own offscreen renderer, built from
+    ``renderer_options``.  Files that cannot be read are reported in their
+    result instead of stopping the batch.  Results are returned in the order
+    of ``csv_paths``.
+    """
+    csv_paths = list(csv_paths)
+    presets = list(presets)
+    renderer_options = renderer_options or {}
+    os.makedirs(output_dir, exist_ok=True)
+    workers = max(1, min(workers, len(csv_paths)))
+
+    if workers == 1:
+        if renderer is None:
+            renderer = SnapshotRenderer(**renderer_options)
+        return [
+            _render_snapshot(renderer, path, output_dir, presets, load_options)
+            for path in csv_paths
+        ]
+
+    # Fresh interpreters rather than forks: GPU and EGL state does not
+    # survive fork() reliably.
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_snapshot_worker,
+        initargs=(renderer_options,),
+    ) as pool:
+        futures = [
+            pool.submit(
+                _snapshot_worker_task, path, output_dir, presets, load_options
             )
+            for path in csv_paths
+        ]
+        return [future.result() for future in futures]
+
+
+def format_snapshot_report(
+    results: Iterable[SnapshotResult], wall_seconds: Optional[float] = None
+) -> str:
+    """Return a plain-text table of per-file snapshot timings."""
+    results = list(results)
+    name_width = max([len("file")] + [len(r.csv_path) for r in results])
+    lines = [
+        f"{'file':<{name_width}} {'loans':>10} {'load s':>8} "
+        f"{'render s':>8} {'total s':>8}"
+    ]
+    for r in results:
+        if r.error is not None:
+            lines.append(f"{r.csv_path:<{name_width}} failed: {r.error}")
+            continue
+        lines.append(
+            f"{r.csv_path:<{name_width}} {r.loans:>10,} {r.load_seconds:>8.2f} "
+            f"{r.render_seconds:>8.2f} {r.total_seconds:>8.2f}"
+        )
+    done = [r for r in results if r.error is None]
+    summary = (
+        f"{len(done)} of {len(results)} files rendered, "
+        f"{sum(len(r.images) for r in done)} images, "
+        f"{sum(r.total_seconds for r in done):.2f}s of work"
+    )
+    if wall_seconds is not None:
+        summary += f" in {wall_seconds:.2f}s"
+    lines.append(summary)
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Visualize loan portfolio data and monitor for updates"
+    )
+    parser.add_argument(
+        "csv_files",
+        nargs="+",
+        metavar="csv_file",
+        help=(
+            "CSV file containing loan data; with --snapshot-dir, several "
+            "files, directories of CSVs or glob patterns may be given"
+        ),
+    )
+    parser.add_argument(
+        "--generate",
+        type=int,
+        metavar="N",
+        help="write N clustered sample loans to the CSV file before showing it",
+    )
+    parser.add_argument(
+        "--clusters",
+        type=int,
+        default=4,
+        metavar="K",
+        help="number of clusters in generated sample data",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="random seed for generated sample data, for reproducible files",
+    )
+    parser.add_argument(
+        "--no-watch",
+        action="store_true",
+        help="show the file once instead of reloading it when it changes",
+    )
+    parser.add_argument(
+        "--check-interval",
+        type=float,
+        default=DEFAULT_CHECK_INTERVAL,
+        help=(
+            "seconds between modification checks where inotify is not "
+            "available"
+        ),
+    )
+    parser.add_argument(
+        "--max-fps",
+        type=float,
+        default=DEFAULT_MAX_FPS,
+        help="upper limit on window redraws per second",
+    )
+    parser.add_argument(
+        "--idle-fps",
+        type=float,
+        default=DEFAULT_IDLE_FPS,
+        help=(
+            f"loop rate once the view has not changed for "
+            f"{DEFAULT_IDLE_AFTER:g} seconds"
+        ),
+    )
+    parser.add_argument(
+        "--render-mode",
+        choices=RENDER_MODES,
+        default="auto",
+        help=(
+            "draw one sphere per loan, merge all loans into a single mesh, "
+            "draw one point per loan, or pick mesh/points by loan count"
+        ),
+    )
+    parser.add_argument(
+        "--point-cloud-threshold",
+        type=int,
+        default=DEFAULT_POINT_CLOUD_THRESHOLD,
+        help="loan count above which the auto render mode uses points",
+    )
+    parser.add_argument(
+        "--triangle-budget",
+        type=int,
+        default=DEFAULT_TRIANGLE_BUDGET,
+        help=(
+            "total sphere triangles to stay under by lowering the sphere "
+            "tessellation on large portfolios"
+        ),
+    )
+    parser.add_argument(
+        "--near-detail",
+        action="store_true",
+        help=(
+            "redraw the loans nearest the camera at full sphere resolution "
+            "whenever the view settles"
+        ),
+    )
+    parser.add_argument(
+        "--key-column",
+        help=(
+            "CSV column identifying each loan, used to update only changed "
+            "loans on reload (default: identify loans by a hash of each row)"
+        ),
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="always parse the CSV instead of using its binary column cache",
+    )
+    parser.add_argument(
+        "--rebuild-cache",
+        action="store_true",
+        help="parse the CSV and rewrite its binary column cache",
+    )
+    parser.add_argument(
+        "--max-loans",
+        type=int,
+        help=(
+            "stream the CSV in chunks and draw a uniform sample of at most "
+            "this many loans, keeping memory use independent of file size"
+        ),
+    )
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=DEFAULT_CHUNK_ROWS,
+        help="rows parsed at a time when streaming with --max-loans",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=(
+            "assume the CSV only grows by appended rows and load just the "
+            "new rows on each change"
+        ),
+    )
+    parser.add_argument(
+        "--snapshot-dir",
+        help=(
+            "render each CSV to PNG files in this directory without opening "
+            "a window, then exit"
+        ),
+    )
+    parser.add_argument(
+        "--camera",
+        action="append",
+        choices=sorted(CAMERA_PRESETS),
+        help="camera preset for snapshots; repeat for several (default: iso)",
+    )
+    parser.add_argument(
+        "--image-size",
+        nargs=2,
+        type=int,
+        default=DEFAULT_SNAPSHOT_SIZE,
+        metavar=("WIDTH", "HEIGHT"),
+        help="snapshot size in pixels",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help=(
+            "processes rendering snapshots or generating large sample files "
+            f"in parallel (default: CPU count, at most {MAX_SNAPSHOT_WORKERS} "
+            "for snapshots)"
+        ),
+    )
+    args = parser.parse_args()
+    if args.incremental and args.max_loans is not None:
+        parser.error("--incremental cannot be combined with --max-loans")
+    if args.generate is not None and args.generate < 1:
+        parser.error("--generate needs a positive number of loans")
+    if args.clusters < 1:
+        parser.error("--clusters needs at least one cluster")
+    if args.max_loans is not None and args.max_loans < 1:
+        parser.error("--max-loans needs a positive number of loans")
+    if args.chunk_rows < 1:
+        parser.error("--chunk-rows needs a positive number of rows")
+    if min(args.max_fps, args.idle_fps, args.check_interval) <= 0:
+        parser.error("--max-fps, --idle-fps and --check-interval must be positive")
+
+    csv_paths = expand_csv_paths(args.csv_files)
+    if not csv_paths:
+        parser.error("no CSV files matched " + " ".join(args.csv_files))
+
+    if args.snapshot_dir is not None:
+        workers = args.workers
+        if workers is None:
+            workers = min(os.cpu_count() or 1, MAX_SNAPSHOT_WORKERS)
+        start = time.perf_counter()
+        results = render_snapshots(
+            csv_paths,
+            args.snapshot_dir,
+            args.camera or ["iso"],
+            workers=workers,
+            renderer_options={
+                "width": args.image_size[0],
+                "height": args.image_size[1],
+                "render_mode": args.render_mode,
+                "point_cloud_threshold": args.point_cloud_threshold,
+                "triangle_budget": args.triangle_budget,
+            },
+            key_column=args.key_column,
+            use_cache=not args.no_cache,
+            rebuild_cache=args.rebuild_cache,
+            max_loans=args.max_loans,
+            chunk_rows=args.chunk_rows,
+        )
+        print(format_snapshot_report(results, time.perf_counter() - start))
+        return
+
+    if len(csv_paths) != 1:
+        parser.error("only one CSV file can be shown interactively")
+    csv_path = csv_paths[0]
+    num_records = args.generate
+    if num_records is None:
+        # Only ask a plain interactive run; when stdin is not a terminal or
+        # any option was given, the caller is a script that just wants a
+        # missing file filled in.
+        options_given = any(
+            value != parser.get_default(name)
+            for name, value in vars(args).items()
+            if name != "csv_files"
+        )
+        answer = ""
+        if sys.stdin.isatty() and not options_given:
+            answer = input(
+                f"Generate a new dataset with {DEFAULT_NUM_RECORDS:,d} sample "
+                "records? [y/N]: "
+            ).strip().lower()
+        if answer == "y" or (answer == "" and not os.path.exists(csv_path)):
+            num_records = DEFAULT_NUM_RECORDS
+    if num_records is not None:
+        generate_sample_csv(
+            csv_path,
+            num_records,
+            args.clusters,
+            args.seed,
+            args.workers or os.cpu_count() or 1,
+        )
+        print(f"Sample data written to {csv_path}")
 
-            axis = o3d.geometry.TriangleMesh.create_coordinate_frame(size=0.2)
-            vis.add_geometry(grid_xy)
-            vis.add_geometry(grid_xz)
-            vis.add_geometry(grid_yz)
-            vis.add_geometry(wall_xy)
-            vis.add_geometry(wall_xz)
-            vis.add_geometry(wall_yz)
+    key_column = args.key_column
+    offset, header_line = 0, b""
+    bounds = None
+    if args.incremental:
+        header_line = read_header_line(csv_path)
+        loans, offset = load_appended_loans(csv_path, 0, key_column)
+    else:
+        loans, bounds = load_portfolio(
+            csv_path,
+            key_column,
+            not args.no_cache,
+            args.rebuild_cache,
+            args.max_loans,
+            args.chunk_rows,
+        )
 
-            if wall_label is not None:
-                vis.add_geometry(wall_label)
+    vis = o3d.visualization.Visualizer()
+    vis.create_window(window_name="Loan Portfolio")
+    scene = LoanScene(
+        vis, args.render_mode, args.point_cloud_threshold, args.triangle_budget
+    )
+    scene.show(loans, reset_bounding_box=True, bounds=bounds)
+    scene_scaffold(grid_size=1.1, divisions=10).attach(vis)
 
-            vis.add_geometry(axis)
-            add_face_titles(vis, grid_size)
+    vis.poll_events()
+    vis.update_renderer()
 
-            vis.get_view_control().convert_from_pinhole_camera_parameters(camera)
+    # Wakes the loop as soon as the CSV has been written, via inotify where
+    # available and by checking the mtime every few seconds otherwise.
+    watcher = None
+    reloader = None
+    if not args.no_watch:
+        watcher = create_watcher(csv_path, args.check_interval)
+        # Parsing and geometry building happen on a worker thread so the
+        # window stays responsive; finished updates wake the loop and are
+        # swapped in between frames.
+        reloader = BackgroundReloader(
+            scene,
+            csv_path,
+            key_column,
+            args.incremental,
+            offset,
+            header_line,
+            args.max_loans,
+            args.chunk_rows,
+        )
+    governor = FrameGovernor(args.max_fps, args.idle_fps)
+    # Camera position the near-camera detail was last built for, and the one
+    # seen on the previous frame; detail is rebuilt once the camera settles.
+    detail_camera = None
+    last_camera = None
+    try:
+        while True:
+            if not vis.poll_events():
+                break
+
+            updates = reloader.poll() if reloader is not None else []
+            for update in updates:
+                scene.apply(update)
+            if updates:
+                governor.invalidate()
+            elif reloader is not None and reloader.pending:
+                # Stay at full rate while a reload is in flight, so its
+                # update is applied and drawn within a frame of landing.
+                governor.activity()
+
+            camera = _camera_center(vis)
+            settled = last_camera is not None and np.allclose(camera, last_camera)
+            if not settled:
+                governor.activity()
+            if args.near_detail:
+                moved = detail_camera is None or not np.allclose(camera, detail_camera)
+                if updates or (settled and moved):
+                    scene.show_near_detail(camera)
+                    detail_camera = camera
+                    governor.invalidate()
+            last_camera = camera
+
+            if governor.should_render():
+                vis.update_renderer()
+
+            timeout = governor.timeout()
+            if watcher is None:
+                time.sleep(timeout)
+            elif watcher.wait(timeout, reloader) and os.path.exists(csv_path):
+                reloader.request()
     except KeyboardInterrupt:
         pass
     finally:
+        if reloader is not None:
+            reloader.close()
+        if watcher is not None:
+            watcher.close()
         vis.destroy_window()
 
 
@@ -0,0 +1,250 @@
+"""Synthetic loan portfolios for demos and load testing.
+
+Loans are drawn around random cluster centers with NumPy and written as CSV
+in large formatted blocks.  Only NumPy is needed, so sample files can be
+produced without importing Open3D.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import os
+import shutil
+from typing import Iterable, Iterator, Union
+
+import numpy as np
+
+from loan_data import FIELDNAMES, LoanColumns
+
+# Default number of records used when generating sample data.
+DEFAULT_NUM_RECORDS = 500
+
+# Ranges sample loans are clamped to, as (minimum, maximum).
+SAMPLE_BALANCE_RANGE = (1_000.0, 100_000.0)
+SAMPLE_RATE_RANGE = (4.0, 12.0)
+SAMPLE_TERM_RANGE = (12.0, 180.0)
+
+# Rows formatted per block when writing sample data.
+SAMPLE_WRITE_ROWS = 100_000
+
+# Rows per independently seeded shard when sample data is generated in
+# parallel.  Smaller files are generated in one piece.
+SAMPLE_SHARD_ROWS = 2_000_000
+
+# ``%`` template for one sample CSV row, in ``FIELDNAMES`` order.
+_SAMPLE_ROW = "%.2f,%.2f,%s,%d,%d\n"
+
+SeedLike = Union[None, int, np.random.SeedSequence, np.random.Generator]
+
+
+def _cluster_sizes(num_records: int, clusters: int) -> np.ndarray:
+    """Return loans per cluster; the last cluster takes the remainder."""
+    sizes = np.full(clusters, num_records // clusters)
+    sizes[-1] = num_records - sizes[:-1].sum()
+    return sizes
+
+
+def _cluster_centers(rng: np.random.Generator, clusters: int) -> np.ndarray:
+    """Return uniformly chosen ``(balance, rate, term)`` cluster centers."""
+    return np.column_stack(
+        (
+            rng.uniform(*SAMPLE_BALANCE_RANGE, clusters),
+            rng.uniform(*SAMPLE_RATE_RANGE, clusters),
+            rng.uniform(*SAMPLE_TERM_RANGE, clusters),
+        )
+    )
+
+
+def _draw_clustered_loans(
+    rng: np.random.Generator, centers: np.ndarray, sizes: np.ndarray
+) -> LoanColumns:
+    """Draw ``sizes[i]`` loans around ``centers[i]`` and shuffle them."""
+    bal_lo, bal_hi = SAMPLE_BALANCE_RANGE
+    rate_lo, rate_hi = SAMPLE_RATE_RANGE
+    term_lo, term_hi = SAMPLE_TERM_RANGE
+    num_records = int(sizes.sum())
+
+    cluster = np.repeat(np.arange(1, len(sizes) + 1, dtype=np.int32), sizes)
+    spreads = np.array(
+        [(bal_hi - bal_lo) / 20, (rate_hi - rate_lo) / 10, (term_hi - term_lo) / 20]
+    )
+    values = rng.normal(centers[cluster - 1], spreads)
+
+    order = rng.permutation(num_records)
+    return LoanColumns(
+        balance=np.clip(values[order, 0], bal_lo, bal_hi),
+        rate=np.clip(values[order, 1], rate_lo, rate_hi),
+        term=np.trunc(np.clip(values[order, 2], term_lo, term_hi)),
+        added=rng.random(num_records) < 0.5,
+        cluster=cluster[order],
+    )
+
+
+def _iter_clustered_loans(
+    rng: np.random.Generator,
+    centers: np.ndarray,
+    sizes: np.ndarray,
+    chunk_rows: int = SAMPLE_WRITE_ROWS,
+) -> Iterator[LoanColumns]:
+    """Yield shuffled loans from clusters of ``sizes`` in chunks.
+
+    How many loans of each cluster go into a chunk is drawn from a
+    multivariate hypergeometric distribution over the loans still to come,
+    then the chunk is shuffled.  Together that orders the loans exactly as
+    one shuffle of the whole set would, without holding it in memory.
+    """
+    remaining = np.array(sizes, dtype=np.int64)
+    while remaining.sum() > 0:
+        count = min(chunk_rows, int(remaining.sum()))
+        chunk_sizes = rng.multivariate_hypergeometric(remaining, count)
+        remaining -= chunk_sizes
+        yield _draw_clustered_loans(rng, centers, chunk_sizes)
+
+
+def iter_sample_loans(
+    num_records: int = DEFAULT_NUM_RECORDS,
+    clusters: int = 4,
+    seed: SeedLike = None,
+    chunk_rows: int = SAMPLE_WRITE_ROWS,
+) -> Iterator[LoanColumns]:
+    """Yield clustered sample loans in random order, ``chunk_rows`` at a time.
+
+    Each cluster gets ``num_records // clusters`` loans (the last one takes
+    the remainder) drawn from normal distributions around a uniformly chosen
+    center, clamped to the sample ranges.  Terms are truncated to whole
+    months and each loan is added or removed with equal probability.
+    ``seed`` makes the output reproducible.  Memory use depends only on
+    ``chunk_rows``.
+    """
+    rng = np.random.default_rng(seed)
+    centers = _cluster_centers(rng, clusters)
+    yield from _iter_clustered_loans(
+        rng, centers, _cluster_sizes(num_records, clusters), chunk_rows
+    )
+
+
+def _format_loan_rows(loans: LoanColumns) -> str:
+    """Return ``loans`` as CSV rows without a header."""
+    count = len(loans)
+    fields = np.empty((count, len(FIELDNAMES)), dtype=object)
+    fields[:, 0] = loans.balance
+    fields[:, 1] = loans.rate
+    fields[:, 2] = np.where(loans.added, "added", "removed")
+    fields[:, 3] = loans.term
+    fields[:, 4] = loans.cluster
+    # One ``%`` over the whole block keeps the formatting loop in C.
+    return (_SAMPLE_ROW * count) % tuple(fields.ravel().tolist())
+
+
+def _write_loan_rows(
+    csvfile, loans: LoanColumns, block_rows: int = SAMPLE_WRITE_ROWS
+) -> None:
+    for start in range(0, len(loans), block_rows):
+        block = loans.take(np.arange(start, min(start + block_rows, len(loans))))
+        csvfile.write(_format_loan_rows(block))
+
+
+def write_loans_csv(
+    path: str,
+    loans: Union[LoanColumns, Iterable[LoanColumns]],
+    block_rows: int = SAMPLE_WRITE_ROWS,
+) -> None:
+    """Write ``loans`` to ``path`` as CSV, ``block_rows`` rows at a time.
+
+    ``loans`` may also be an iterable of chunks, which are written as they
+    arrive.
+    """
+    chunks = [loans] if isinstance(loans, LoanColumns) else loans
+    with open(path, "w", newline="") as csvfile:
+        csvfile.write(",".join(FIELDNAMES) + "\n")
+        for chunk in chunks:
+            _write_loan_rows(csvfile, chunk, block_rows)
+
+
+def _write_sample_shard(
+    path: str,
+    centers: np.ndarray,
+    sizes: np.ndarray,
+    seed: np.random.SeedSequence,
+) -> None:
+    """Generate one shard of sample loans and write it to ``path`` headerless."""
+    rng = np.random.default_rng(seed)
+    with open(path, "w", newline="") as csvfile:
+        for chunk in _iter_clustered_loans(rng, centers, sizes):
+            _write_loan_rows(csvfile, chunk)
+
+
+def _shard_cluster_sizes(sizes: np.ndarray, shards: int) -> np.ndarray:
+    """Split every cluster evenly over ``shards``, shape ``(shards, clusters)``."""
+    split = np.repeat((sizes // shards)[np.newaxis, :], shards, axis=0)
+    split[np.arange(shards)[:, np.newaxis] < sizes % shards] += 1
+    return split
+
+
+def _write_sharded_sample_csv(
+    path: str,
+    num_records: int,
+    clusters: int,
+    seed: SeedLike,
+    workers: int,
+    shards: int,
+) -> None:
+    """Generate sample data as independently seeded shards in a process pool.
+
+    The cluster centers are drawn once and every shard holds its share of
+    each cluster, shuffled, so the file has the same distribution as one
+    generated in a single piece.  The shards are written to temporary
+    files next to ``path`` and joined under a single header.
+    """
+    if isinstance(seed, np.random.Generator):
+        seed = int(seed.integers(2**63))
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    centers_seed, *shard_seeds = seed.spawn(shards + 1)
+    centers = _cluster_centers(np.random.default_rng(centers_seed), clusters)
+    shard_sizes = _shard_cluster_sizes(_cluster_sizes(num_records, clusters), shards)
+
+    part_paths = [f"{path}.part{idx:04d}" for idx in range(shards)]
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_write_sample_shard, part, centers, sizes, shard_seed)
+                for part, sizes, shard_seed in zip(
+                    part_paths, shard_sizes, shard_seeds
+                )
+            ]
+            for future in futures:
+                future.result()
+        with open(path, "wb") as out:
+            out.write((",".join(FIELDNAMES) + "\n").encode())
+            for part in part_paths:
+                with open(part, "rb") as src:
+                    shutil.copyfileobj(src, out, 16 * 1024 * 1024)
+    finally:
+        for part in part_paths:
+            if os.path.exists(part):
+                os.remove(part)
+
+
+def generate_sample_csv(
+    path: str,
+    num_records: int = DEFAULT_NUM_RECORDS,
+    clusters: int = 4,
+    seed: SeedLike = None,
+    workers: int = 1,
+) -> None:
+    """Write clustered sample loan data to ``path``.
+
+    Files larger than ``SAMPLE_SHARD_ROWS`` are generated in shards spread
+    over ``workers`` processes.  The shard layout depends only on
+    ``num_records``, so a given ``seed`` produces the same file whatever the
+    number of workers.  Loans are generated and written in chunks, so memory
+    use does not grow with ``num_records``.
+    """
+    shards = -(-num_records // SAMPLE_SHARD_ROWS)
+    if shards > 1:
+        _write_sharded_sample_csv(
+            path, num_records, clusters, seed, max(1, min(workers, shards)), shards
+        )
+        return
+    write_loans_csv(path, iter_sample_loans(num_records, clusters, seed))
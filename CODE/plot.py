@@ -1,43 +1,35 @@
 """Plot loan portfolio metrics from a CSV file using Matplotlib."""
 
 import argparse
-import csv
-from typing import List
 
 import matplotlib.pyplot as plt
 import numpy as np
 
-
-def load_loans(csv_path: str) -> List[dict]:
-    """Return a list of loan records from ``csv_path``."""
-
-    loans: List[dict] = []
-    with open(csv_path, newline="") as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            loans.append(row)
-    return loans
+from loan_data import load_loans, load_loans_cached
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Plot loan data from CSV")
     parser.add_argument("csv_file", help="CSV file containing loan data")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="always parse the CSV instead of using its binary column cache",
+    )
+    parser.add_argument(
+        "--rebuild-cache",
+        action="store_true",
+        help="parse the CSV and rewrite its binary column cache",
+    )
     args = parser.parse_args()
 
-    loans = load_loans(args.csv_file)
+    if args.no_cache:
+        loans = load_loans(args.csv_file)
+    else:
+        loans = load_loans_cached(args.csv_file, rebuild=args.rebuild_cache)
 
-    points = np.array(
-        [
-            [
-                float(row["loantermOrAgeInMonths"]),
-                float(row["loanbalance"]),
-                float(row["loanrate"]),
-            ]
-            for row in loans
-        ],
-        dtype=float,
-    )
-    clusters = np.array([int(row.get("cluster", 0)) for row in loans], dtype=int)
+    points = np.column_stack((loans.term, loans.balance, loans.rate))
+    clusters = loans.cluster
 
     fig = plt.figure(figsize=(10, 7))
     ax = fig.add_subplot(111, projection="3d")
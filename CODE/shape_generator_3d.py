@@ -1,59 +1,356 @@
-# -*- coding: utf-8 -*-
-"""
-Created by Florent Poux, (c) 2024 Licence MIT
-Learn more at: learngeodata.eu
-
-Have fun with this script!
-"""
-
-import numpy as np
-import open3d as o3d
-
-def generate_random_point_cloud(num_points=5000, num_shapes=1):
-    # Initialize an empty list to store all points
-    points = []
-    
-    # Generate multiple shapes
-    for _ in range(num_shapes):
-        # Randomly choose a shape type
-        shape_type = np.random.choice(['sphere', 'cube', 'plane'])
-        # Calculate number of points for this shape
-        shape_points = num_points // num_shapes
-        
-        if shape_type == 'sphere':
-            # Generate points on a sphere
-            radius = np.random.uniform(0.5, 1.0)
-            theta = np.random.uniform(0, 2*np.pi, shape_points)
-            phi = np.random.uniform(0, np.pi, shape_points)
-            x = radius * np.sin(phi) * np.cos(theta)
-            y = radius * np.sin(phi) * np.sin(theta)
-            z = radius * np.cos(phi)
-        elif shape_type == 'cube':
-            # Generate points in a cube
-            x = np.random.uniform(-1, 1, shape_points)
-            y = np.random.uniform(-1, 1, shape_points)
-            z = np.random.uniform(-1, 1, shape_points)
-        else:  # plane
-            # Generate points on a plane (z=0)
-            x = np.random.uniform(-1, 1, shape_points)
-            y = np.random.uniform(-1, 1, shape_points)
-            z = np.zeros(shape_points)
-        
-        # Generate a random center for the shape
-        shape_center = np.random.uniform(-5, 5, 3)
-        # Add the shape's points to the main list, offsetting by the shape's center
-        points.extend(np.column_stack((x, y, z)) + shape_center)
-    
-    # Convert the list of points to a numpy array and return
-    return np.array(points)
-
-#%% Random Experiments
-# Generate random point cloud with 10000 points and 8 shapes
-point_cloud = generate_random_point_cloud(10000, 8)
-
-# Create Open3D point cloud object
-pcd = o3d.geometry.PointCloud()
-pcd.points = o3d.utility.Vector3dVector(point_cloud)
-
-# Visualize the point cloud
-o3d.visualization.draw_geometries([pcd])
+# -*- coding: utf-8 -*-
+"""
+Created by Florent Poux, (c) 2024 Licence MIT
+Learn more at: learngeodata.eu
+
+Have fun with this script!
+
+Importing this module only needs NumPy; Open3D is loaded when a cloud is
+shown, so worker processes that just need synthetic points start quickly.
+"""
+
+import argparse
+import json
+
+import numpy as np
+
+# Shapes the generator picks from by default
+SHAPE_TYPES = ('sphere', 'cube', 'plane')
+
+# Every shape that can be generated.  All but the solid cube are surfaces
+# sampled uniformly by area.
+ALL_SHAPE_TYPES = ('sphere', 'cube', 'plane', 'cylinder', 'cone', 'torus', 'box', 'noisy_plane')
+
+# Points per chunk when streaming clouds too large for memory
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+# Binary layout of one vertex in the PLY files written below
+PLY_VERTEX = np.dtype([('x', '<f4'), ('y', '<f4'), ('z', '<f4'), ('shape', '<i4')])
+
+
+def _random_rotation(rng):
+    """Return a uniformly random 3x3 rotation matrix."""
+    q, r = np.linalg.qr(rng.normal(size=(3, 3)))
+    q *= np.sign(np.diag(r))
+    # Flip one axis if needed so that it is a rotation, not a reflection
+    if np.linalg.det(q) < 0:
+        q[:, 0] = -q[:, 0]
+    return q
+
+
+def _shape_parameters(shape_type, rng):
+    """Pick the dimensions of one shape, in its own frame (axis along z)."""
+    if shape_type == 'sphere':
+        return {'radius': rng.uniform(0.5, 1.0)}
+    if shape_type == 'cube':
+        return {'half_size': 1.0}
+    if shape_type == 'plane':
+        return {'size': 2.0}
+    if shape_type == 'cylinder':
+        return {'radius': rng.uniform(0.3, 0.8), 'height': rng.uniform(1.0, 2.0)}
+    if shape_type == 'cone':
+        return {'radius': rng.uniform(0.5, 1.0), 'height': rng.uniform(1.0, 2.0)}
+    if shape_type == 'torus':
+        return {'major_radius': rng.uniform(0.6, 1.0), 'minor_radius': rng.uniform(0.1, 0.3)}
+    if shape_type == 'box':
+        return {'size': rng.uniform(0.5, 2.0, 3)}
+    if shape_type == 'noisy_plane':
+        return {'size': 2.0, 'noise': rng.uniform(0.005, 0.02)}
+    raise ValueError(f"Unknown shape type: {shape_type}")
+
+
+def _random_shapes(num_points, num_shapes, rng, shape_types=SHAPE_TYPES, rotate=False):
+    """Pick the type, dimensions, pose and point count of every shape."""
+    if num_points < 1:
+        raise ValueError(f"num_points must be positive, got {num_points}")
+    if num_shapes < 1:
+        raise ValueError(f"num_shapes must be positive, got {num_shapes}")
+    # Split the points evenly, giving the remainder to the first shapes
+    sizes = np.full(num_shapes, num_points // num_shapes)
+    sizes[: num_points % num_shapes] += 1
+    shapes = []
+    for size in sizes:
+        # Randomly choose a shape type, its dimensions and its pose
+        shape = {'type': str(rng.choice(shape_types)), 'num_points': int(size)}
+        shape.update(_shape_parameters(shape['type'], rng))
+        shape['center'] = rng.uniform(-5, 5, 3)
+        shape['rotation'] = _random_rotation(rng) if rotate else np.eye(3)
+        # Ground truth of the symmetry axis (or plane normal) in world space
+        if shape['type'] in ('cylinder', 'cone', 'torus'):
+            shape['axis'] = shape['rotation'][:, 2].copy()
+        elif shape['type'] in ('plane', 'noisy_plane'):
+            shape['normal'] = shape['rotation'][:, 2].copy()
+        if shape['type'] == 'cone':
+            shape['apex'] = shape['center'] + shape['height'] * shape['axis']
+        shapes.append(shape)
+    return shapes
+
+
+def random_shapes(num_points, num_shapes=1, shape_types=SHAPE_TYPES, rotate=False, seed=None):
+    """Return ground-truth descriptions of ``num_shapes`` random shapes.
+
+    Each shape is a dict with its ``type``, ``num_points``, ``center`` and
+    ``rotation`` plus its dimensions (``radius``, ``height``, ``size``,
+    ``major_radius``/``minor_radius``, ``noise`` ...) and, where it has one,
+    its ``axis`` or plane ``normal``.  Cylinders are centered on their
+    middle, cones on their base with ``apex`` ``height`` along the axis.
+    Pass the list to :func:`iter_point_cloud_chunks` to stream exactly
+    these shapes.
+    """
+    return _random_shapes(num_points, num_shapes, np.random.default_rng(seed), shape_types, rotate)
+
+
+def _sample_shape(out, shape, rng):
+    """Fill ``out`` (an ``(n, 3)`` slice) with points of one shape."""
+    shape_points = len(out)
+    shape_type = shape['type']
+    x, y, z = out.T
+    
+    if shape_type == 'sphere':
+        # Uniform on the sphere: z uniform in [-r, r], angle uniform around it
+        radius = shape['radius']
+        theta = rng.uniform(0, 2*np.pi, shape_points)
+        z[:] = rng.uniform(-radius, radius, shape_points)
+        ring = np.sqrt(np.maximum(radius**2 - z.astype(np.float64)**2, 0))
+        np.multiply(ring, np.cos(theta), out=x)
+        np.multiply(ring, np.sin(theta), out=y)
+    elif shape_type == 'cube':
+        # Generate points in a solid cube
+        half = shape['half_size']
+        out[:] = rng.uniform(-half, half, (shape_points, 3))
+    elif shape_type in ('plane', 'noisy_plane'):
+        # Generate points on a square in the z=0 plane
+        half = shape['size'] / 2
+        x[:] = rng.uniform(-half, half, shape_points)
+        y[:] = rng.uniform(-half, half, shape_points)
+        if shape_type == 'noisy_plane':
+            z[:] = rng.normal(0, shape['noise'], shape_points)
+        else:
+            z[:] = 0
+    elif shape_type == 'cylinder':
+        # Side of a cylinder: angle and height are both uniform
+        theta = rng.uniform(0, 2*np.pi, shape_points)
+        np.multiply(shape['radius'], np.cos(theta), out=x)
+        np.multiply(shape['radius'], np.sin(theta), out=y)
+        z[:] = rng.uniform(-shape['height'] / 2, shape['height'] / 2, shape_points)
+    elif shape_type == 'cone':
+        # Side of a cone: area grows linearly with the distance from the
+        # apex, so that distance goes as the square root of a uniform draw
+        theta = rng.uniform(0, 2*np.pi, shape_points)
+        from_apex = np.sqrt(rng.uniform(0, 1, shape_points))
+        np.multiply(shape['radius'] * from_apex, np.cos(theta), out=x)
+        np.multiply(shape['radius'] * from_apex, np.sin(theta), out=y)
+        np.multiply(shape['height'], 1 - from_apex, out=z)
+    elif shape_type == 'torus':
+        # The outer side of a torus has more area than the inner side, so
+        # tube angles are accepted in proportion to their distance from the axis
+        major, minor = shape['major_radius'], shape['minor_radius']
+        phi = np.empty(shape_points)
+        filled = 0
+        while filled < shape_points:
+            candidates = rng.uniform(0, 2*np.pi, 2 * (shape_points - filled) + 16)
+            keep = rng.uniform(0, major + minor, len(candidates)) < major + minor * np.cos(candidates)
+            accepted = candidates[keep][: shape_points - filled]
+            phi[filled:filled + len(accepted)] = accepted
+            filled += len(accepted)
+        theta = rng.uniform(0, 2*np.pi, shape_points)
+        ring = major + minor * np.cos(phi)
+        np.multiply(ring, np.cos(theta), out=x)
+        np.multiply(ring, np.sin(theta), out=y)
+        np.multiply(minor, np.sin(phi), out=z)
+    elif shape_type == 'box':
+        # Surface of a box: pick faces in proportion to their area, then a
+        # uniform point on the chosen face
+        size = shape['size']
+        face_areas = np.repeat([size[1] * size[2], size[0] * size[2], size[0] * size[1]], 2)
+        faces = rng.choice(6, shape_points, p=face_areas / face_areas.sum())
+        out[:] = rng.uniform(-0.5, 0.5, (shape_points, 3)) * size
+        axis = faces // 2
+        out[np.arange(shape_points), axis] = np.where(faces % 2, 0.5, -0.5) * size[axis]
+    else:
+        raise ValueError(f"Unknown shape type: {shape_type}")
+    
+    # Turn the shape into its pose and offset it by its center, in place
+    if not np.array_equal(shape['rotation'], np.eye(3)):
+        out[:] = out @ shape['rotation'].T.astype(out.dtype)
+    out += shape['center'].astype(out.dtype)
+
+
+def generate_labeled_point_cloud(num_points=5000, num_shapes=1, shape_types=SHAPE_TYPES,
+                                 rotate=False, seed=None, dtype=np.float64):
+    """Return ``(points, labels, shapes)`` for a cloud of random shapes.
+
+    ``labels`` holds the index into ``shapes`` of every point, and
+    ``shapes`` the ground truth described in :func:`random_shapes`.
+    ``shape_types`` picks from :data:`ALL_SHAPE_TYPES`; ``rotate`` gives
+    every shape a random orientation instead of keeping it axis-aligned.
+    """
+    rng = np.random.default_rng(seed)
+    shapes = _random_shapes(num_points, num_shapes, rng, shape_types, rotate)
+    # Preallocate the whole cloud and fill one slice per shape in place
+    points = np.empty((num_points, 3), dtype=dtype)
+    labels = np.empty(num_points, dtype=np.int32)
+    start = 0
+    for shape_id, shape in enumerate(shapes):
+        stop = start + shape['num_points']
+        _sample_shape(points[start:stop], shape, rng)
+        labels[start:stop] = shape_id
+        start = stop
+    return points, labels, shapes
+
+
+def generate_random_point_cloud(num_points=5000, num_shapes=1, seed=None, dtype=np.float64,
+                                shape_types=SHAPE_TYPES):
+    """Return ``num_points`` points spread over ``num_shapes`` random shapes.
+
+    ``seed`` may be an integer or a ``np.random.Generator`` for reproducible
+    clouds.  The points are written straight into one preallocated
+    ``(num_points, 3)`` array of ``dtype``.
+    """
+    points, _, _ = generate_labeled_point_cloud(num_points, num_shapes, shape_types,
+                                                seed=seed, dtype=dtype)
+    return points
+
+
+def iter_point_cloud_chunks(num_points, num_shapes=1, chunk_size=DEFAULT_CHUNK_SIZE,
+                            seed=None, dtype=np.float32, shape_types=SHAPE_TYPES,
+                            rotate=False, shapes=None):
+    """Yield a random point cloud as ``(points, labels)`` chunks.
+
+    Same shapes as :func:`generate_labeled_point_cloud`, but never more than
+    ``chunk_size`` points are held in memory.  ``labels`` gives the index of
+    the shape each point belongs to.  To know the ground truth, pick the
+    shapes with :func:`random_shapes` and pass them as ``shapes``; the other
+    shape arguments are then ignored.  The chunk arrays are reused, so copy
+    them if you keep them past the next iteration.
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+    rng = np.random.default_rng(seed)
+    if shapes is None:
+        shapes = _random_shapes(num_points, num_shapes, rng, shape_types, rotate)
+    num_points = sum(shape['num_points'] for shape in shapes)
+    points = np.empty((min(chunk_size, num_points), 3), dtype=dtype)
+    labels = np.empty(len(points), dtype=np.int32)
+    
+    # Walk through the shapes, cutting them at chunk boundaries
+    filled = 0
+    for shape_id, shape in enumerate(shapes):
+        size = shape['num_points']
+        while size > 0:
+            take = min(size, len(points) - filled)
+            _sample_shape(points[filled:filled + take], shape, rng)
+            labels[filled:filled + take] = shape_id
+            filled += take
+            size -= take
+            if filled == len(points):
+                yield points, labels
+                filled = 0
+    if filled:
+        yield points[:filled], labels[:filled]
+
+
+def write_point_cloud_chunks(path, chunks, fmt=None):
+    """Stream ``(points, labels)`` chunks to ``path`` and return the point count.
+
+    ``fmt`` is ``'ply'`` for a binary little-endian PLY file with a ``shape``
+    label per vertex, or ``'raw'`` for bare little-endian float32 ``x y z``
+    triples (labels are dropped).  By default it follows the file extension.
+    """
+    if fmt is None:
+        fmt = 'ply' if path.lower().endswith('.ply') else 'raw'
+    if fmt not in ('ply', 'raw'):
+        raise ValueError(f"Unknown point cloud format: {fmt}")
+    
+    count = 0
+    with open(path, 'wb') as f:
+        if fmt == 'ply':
+            # The vertex count is patched in at the end, so leave room for it
+            header_start = ('ply\nformat binary_little_endian 1.0\n'
+                            'element vertex ').encode()
+            count_width = 20
+            f.write(header_start + b' ' * count_width + (
+                '\nproperty float x\nproperty float y\nproperty float z\n'
+                'property int shape\nend_header\n').encode())
+        for points, labels in chunks:
+            if fmt == 'ply':
+                vertices = np.empty(len(points), dtype=PLY_VERTEX)
+                vertices['x'], vertices['y'], vertices['z'] = points.T
+                vertices['shape'] = labels
+                vertices.tofile(f)
+            else:
+                np.asarray(points, dtype='<f4').tofile(f)
+            count += len(points)
+        if fmt == 'ply':
+            f.seek(len(header_start))
+            f.write(str(count).ljust(count_width).encode())
+    return count
+
+def write_shape_parameters(path, shapes):
+    """Save the ground truth of ``shapes`` to ``path`` as JSON."""
+    records = [{key: np.asarray(value).tolist() if isinstance(value, np.ndarray) else value
+                for key, value in shape.items()} for shape in shapes]
+    with open(path, 'w') as f:
+        json.dump(records, f, indent=2)
+
+
+def show_point_cloud(points):
+    """Open an Open3D window showing ``points``."""
+    # Imported here so that generating points never pays for Open3D
+    import open3d as o3d
+    
+    # Create Open3D point cloud object
+    pcd = o3d.geometry.PointCloud()
+    pcd.points = o3d.utility.Vector3dVector(points)
+    
+    # Visualize the point cloud
+    o3d.visualization.draw_geometries([pcd])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate random 3D shapes as a point cloud")
+    parser.add_argument("--points", type=int, default=10000, help="number of points to generate")
+    parser.add_argument("--shapes", type=int, default=8, help="number of shapes to spread them over")
+    parser.add_argument("--seed", type=int, help="random seed for a reproducible cloud")
+    parser.add_argument(
+        "--shape-types", nargs="+", choices=ALL_SHAPE_TYPES, default=list(SHAPE_TYPES),
+        help="shapes to pick from (default: %(default)s)",
+    )
+    parser.add_argument("--rotate", action="store_true", help="give every shape a random orientation")
+    parser.add_argument(
+        "--output",
+        help=(
+            "stream the cloud to this .ply (binary) or raw float32 file instead of showing it; "
+            "the shapes' ground truth goes to <output>.shapes.json"
+        ),
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+        help="points generated at a time when writing to --output",
+    )
+    args = parser.parse_args(argv)
+    if args.points < 1:
+        parser.error("--points needs a positive number of points")
+    if args.shapes < 1:
+        parser.error("--shapes needs at least one shape")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size needs a positive number of points")
+    
+    if args.output:
+        rng = np.random.default_rng(args.seed)
+        shapes = random_shapes(args.points, args.shapes, args.shape_types, args.rotate, rng)
+        chunks = iter_point_cloud_chunks(args.points, chunk_size=args.chunk_size, seed=rng,
+                                         shapes=shapes)
+        count = write_point_cloud_chunks(args.output, chunks)
+        write_shape_parameters(args.output + '.shapes.json', shapes)
+        print(f"{count:,d} points written to {args.output}")
+        return
+    
+    # Generate a random point cloud, 10000 points over 8 shapes by default
+    point_cloud, _, _ = generate_labeled_point_cloud(args.points, args.shapes, args.shape_types,
+                                                     args.rotate, args.seed)
+    show_point_cloud(point_cloud)
+
+
+if __name__ == "__main__":
+    main()
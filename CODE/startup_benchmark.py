@@ -0,0 +1,83 @@
+"""Measure how long the loan tools take to start.
+
+Each command is run in a fresh interpreter several times and the fastest and
+median wall-clock times are reported, e.g.::
+
+    python CODE/startup_benchmark.py --repeat 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _commands(scratch_csv: str):
+    """Return ``(label, argv)`` pairs for the startup paths worth timing."""
+    visualizer = os.path.join(HERE, "loan_portfolio_visualizer.py")
+    return [
+        ("python -c pass", [sys.executable, "-c", "pass"]),
+        ("visualizer --help", [sys.executable, visualizer, "--help"]),
+        (
+            "import loan_portfolio_visualizer",
+            [sys.executable, "-c", "import loan_portfolio_visualizer"],
+        ),
+        (
+            "generate 10,000 sample loans",
+            [
+                sys.executable,
+                "-c",
+                "from loan_samples import generate_sample_csv; "
+                f"generate_sample_csv({scratch_csv!r}, 10_000, seed=0)",
+            ],
+        ),
+        (
+            "load and scale 10,000 loans",
+            [
+                sys.executable,
+                "-c",
+                "from loan_data import load_loans, loan_features, scale_features; "
+                f"scale_features(loan_features(load_loans({scratch_csv!r})))",
+            ],
+        ),
+        ("import open3d", [sys.executable, "-c", "import open3d"]),
+    ]
+
+
+def time_command(argv, repeat: int):
+    """Return the wall-clock seconds of ``repeat`` runs of ``argv``."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(argv, cwd=HERE, stdout=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time loan tool startup paths")
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="runs per command (default: 5)"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        scratch_csv = os.path.join(scratch, "loans.csv")
+        commands = _commands(scratch_csv)
+        width = max(len(label) for label, _ in commands)
+        print(f"{'command':<{width}} {'min s':>7} {'median s':>9}")
+        for label, argv in commands:
+            times = time_command(argv, args.repeat)
+            print(
+                f"{label:<{width}} {min(times):>7.3f} "
+                f"{statistics.median(times):>9.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
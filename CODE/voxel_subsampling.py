@@ -0,0 +1,203 @@
+"""Voxel grid subsampling of point clouds.
+
+Points are binned into cubic voxels and every non-empty voxel is replaced by
+one representative: the barycenter of its points, or the point closest to
+that barycenter.  Each voxel's three integer coordinates are packed into a
+single ``int64`` key, so grouping the points takes one sort of a flat array
+instead of a lexicographic ``np.unique(..., axis=0)``.  The per-voxel
+reductions are then done with ``np.add.reduceat`` and friends over the sorted
+order, without a Python loop over voxels.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Representatives grid_subsampling() can keep for each voxel.
+SUBSAMPLING_METHODS = ("barycenter", "closest")
+
+
+def voxel_indices(
+    points: np.ndarray, voxel_size: float, origin: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Return the integer ``(i, j, k)`` voxel of every point.
+
+    ``origin`` is the corner of voxel ``(0, 0, 0)`` and defaults to the
+    minimum of ``points``.  Points below it would get negative indices,
+    which are rejected.
+    """
+    if voxel_size <= 0:
+        raise ValueError(f"voxel_size must be positive, got {voxel_size}")
+    if origin is None:
+        origin = points.min(axis=0)
+    # ``//`` in place bins exactly like ``(points - origin) // voxel_size``
+    # without allocating a second array.
+    offsets = np.subtract(points, origin, dtype=np.result_type(points, origin, np.float32))
+    np.floor_divide(offsets, voxel_size, out=offsets)
+    indices = offsets.astype(np.int64)
+    if len(indices) and indices.min() < 0:
+        raise ValueError("points lie below the voxel grid origin")
+    return indices
+
+
+def pack_voxel_keys(indices: np.ndarray) -> Tuple[np.ndarray, Tuple[int, int, int]]:
+    """Pack ``(i, j, k)`` voxel indices into one ``int64`` key per row.
+
+    The key is ``(i * ny + j) * nz + k`` for a grid of ``(nx, ny, nz)``
+    voxels, so sorting keys orders voxels exactly as a lexicographic sort of
+    the index rows would.  Returns the keys and the grid shape.
+    """
+    if len(indices) == 0:
+        return np.empty(0, dtype=np.int64), (0, 0, 0)
+    shape = tuple(int(n) + 1 for n in indices.max(axis=0))
+    if shape[0] * shape[1] * shape[2] > np.iinfo(np.int64).max:
+        raise ValueError(f"a {shape} voxel grid does not fit in int64 keys")
+    keys = indices[:, 0] * shape[1]
+    keys += indices[:, 1]
+    keys *= shape[2]
+    keys += indices[:, 2]
+    return keys, shape
+
+
+@dataclass
+class VoxelGrid:
+    """Points grouped by voxel.
+
+    Attributes
+    ----------
+    voxel_size : float
+        Edge length of the voxels.
+    origin : np.ndarray
+        Corner of voxel ``(0, 0, 0)``.
+    shape : tuple of int
+        Number of voxels along each axis.
+    keys : np.ndarray
+        Packed key of every non-empty voxel, in increasing order.
+    order : np.ndarray
+        Point indices sorted by voxel; the points of voxel ``v`` are
+        ``order[starts[v]:starts[v] + counts[v]]``.
+    starts : np.ndarray
+        Offset into ``order`` of each voxel's first point.
+    counts : np.ndarray
+        Number of points in each voxel.
+    """
+
+    voxel_size: float
+    origin: np.ndarray
+    shape: Tuple[int, int, int]
+    keys: np.ndarray
+    order: np.ndarray
+    starts: np.ndarray
+    counts: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def indices(self) -> np.ndarray:
+        """Return the ``(i, j, k)`` index of every non-empty voxel."""
+        return np.column_stack(np.unravel_index(self.keys, self.shape))
+
+    def point_voxels(self) -> np.ndarray:
+        """Return the voxel of every point, in sorted (``order``) order."""
+        return np.repeat(np.arange(len(self.keys)), self.counts)
+
+    def _reduce(
+        self, points: np.ndarray, distances: bool
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Return voxel barycenters and, optionally, squared point distances.
+
+        Works one coordinate at a time, so only a single sorted column of
+        ``points`` is held in memory besides the results.  Distances are
+        those of the points in ``order`` to their voxel's barycenter.
+        """
+        centers = np.empty((len(self.keys), points.shape[1]))
+        squared = np.zeros(len(self.order)) if distances else None
+        for axis in range(points.shape[1]):
+            column = points[:, axis][self.order]
+            center = centers[:, axis]
+            np.add.reduceat(column, self.starts, dtype=np.float64, out=center)
+            center /= self.counts
+            if distances:
+                offset = column - np.repeat(center, self.counts)
+                offset *= offset
+                squared += offset
+        return centers, squared
+
+    def barycenters(self, points: np.ndarray) -> np.ndarray:
+        """Return the mean of the points in each voxel, as ``float64``."""
+        return self._reduce(points, distances=False)[0]
+
+    def closest_points(self, points: np.ndarray) -> np.ndarray:
+        """Return the index of the point closest to each voxel's barycenter.
+
+        Ties go to the point that comes first in ``points``.
+        """
+        _, distances = self._reduce(points, distances=True)
+        nearest = np.minimum.reduceat(distances, self.starts)
+        # Sorted positions holding their voxel's minimum.  Points of a voxel
+        # are in input order, so the first one found in each voxel wins.
+        voxels = self.point_voxels()
+        candidates = np.flatnonzero(distances == nearest[voxels])
+        first = np.ones(len(candidates), dtype=bool)
+        first[1:] = voxels[candidates[1:]] != voxels[candidates[:-1]]
+        return self.order[candidates[first]]
+
+
+def _sort_order(keys: np.ndarray) -> np.ndarray:
+    """Return the indices sorting ``keys``, ties in their original order.
+
+    When the keys leave enough spare bits, each point's index is packed
+    below its key and the combined values are sorted directly, which is
+    much faster than a stable ``argsort`` and still breaks ties by index.
+    """
+    index_bits = max(int(len(keys) - 1).bit_length(), 1)
+    if len(keys) == 0 or int(keys.max()) >= 1 << (63 - index_bits):
+        return np.argsort(keys, kind="stable")
+    combined = keys << index_bits
+    combined |= np.arange(len(keys))
+    combined.sort()
+    combined &= (1 << index_bits) - 1
+    return combined
+
+
+def voxelize(
+    points: np.ndarray, voxel_size: float, origin: Optional[np.ndarray] = None
+) -> VoxelGrid:
+    """Group ``points`` (an ``(n, 3)`` array) into voxels of ``voxel_size``."""
+    points = np.asarray(points)
+    if origin is None:
+        origin = points.min(axis=0) if len(points) else np.zeros(points.shape[1])
+    keys, shape = pack_voxel_keys(voxel_indices(points, voxel_size, origin))
+
+    order = _sort_order(keys)
+    sorted_keys = keys[order]
+    boundaries = np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+    starts = np.concatenate(([0], boundaries)) if len(keys) else boundaries
+    counts = np.diff(np.append(starts, len(keys)))
+    return VoxelGrid(
+        voxel_size, np.asarray(origin), shape, sorted_keys[starts], order, starts, counts
+    )
+
+
+def grid_subsampling(
+    points: np.ndarray, voxel_size: float, method: str = "closest"
+) -> np.ndarray:
+    """Return one representative point per non-empty voxel.
+
+    ``method`` is ``"barycenter"`` for the mean of each voxel's points or
+    ``"closest"`` for the input point nearest to that mean.  Voxels are
+    anchored at the minimum of ``points`` and returned in lexicographic
+    ``(i, j, k)`` order.
+    """
+    if method not in SUBSAMPLING_METHODS:
+        raise ValueError(
+            f"method must be one of {', '.join(SUBSAMPLING_METHODS)}, got {method!r}"
+        )
+    points = np.asarray(points)
+    grid = voxelize(points, voxel_size)
+    if method == "barycenter":
+        return grid.barycenters(points)
+    return points[grid.closest_points(points)]